@@ -0,0 +1,315 @@
+"""Benchmarks for the Enhanced Process Monitor collectors and encoders.
+
+Run all benchmarks, or only the named ones:
+
+    python benchmark.py
+    python benchmark.py collectors
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import psutil
+
+import enhanced_process_monitor as monitor
+
+
+def timed(func, iterations):
+    """Run func repeatedly and return (mean seconds per call, last result)"""
+    result = func()  # warm-up, also primes CPU% baselines
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - started) / iterations, result
+
+
+def bench_collectors(iterations=20):
+    """Compare the /proc fast path with the psutil process collector"""
+    print(f"Process collectors ({iterations} scans each)")
+
+    psutil_time, processes = timed(monitor.PsutilCollector().collect, iterations)
+    print(f"  psutil:  {psutil_time * 1000:8.2f} ms/scan  ({len(processes)} processes)")
+
+    if not sys.platform.startswith('linux'):
+        print("  /proc:   skipped, not on Linux")
+        return
+
+    collector = monitor.ProcFSCollector()
+    proc_time, processes = timed(collector.collect, iterations)
+    print(f"  /proc:   {proc_time * 1000:8.2f} ms/scan  ({len(processes)} processes)")
+    print(f"  speedup: {psutil_time / proc_time:8.2f}x")
+
+
+def bench_scan_workers(iterations=10):
+    """Show how the sharded process scan scales with the number of workers"""
+    print(f"Sharded process scan with {type(monitor.process_collector).__name__} ({iterations} scans each)")
+
+    # Split even small hosts so the scaling is visible
+    monitor.PROCESS_SCAN_MIN_SHARD = 1
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        monitor.PROCESS_SCAN_WORKERS = workers
+        monitor.scan_executor = monitor.ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        scan_time, _ = timed(monitor.scan_processes, iterations)
+        baseline = baseline or scan_time
+        shards = monitor.sampler_stats['scan']['shards']
+        slowest = max(shard['seconds'] for shard in shards)
+        print(f"  {workers} workers: {scan_time * 1000:8.2f} ms/scan  "
+              f"({baseline / scan_time:.2f}x, slowest shard {slowest * 1000:.2f} ms)")
+
+
+def synthetic_processes(count):
+    """Real process rows from this host, repeated under new PIDs up to `count` rows"""
+    processes = monitor.get_process_list()
+    rows = []
+    for i in range(count):
+        row = dict(processes[i % len(processes)])
+        row['pid'] = 100000 + i
+        rows.append(row)
+    return rows
+
+
+def bench_wire_format(count=5000, iterations=20):
+    """Compare JSON and the columnar binary frame for a full process_list tick"""
+    processes = synthetic_processes(count)
+    update = {
+        'type': 'full',
+        'seq': 1,
+        'order': [proc['pid'] for proc in processes],
+        'offset': 0,
+        'total': len(processes),
+        'processes': processes
+    }
+    rows = {proc['pid']: proc for proc in processes}
+    print(f"Wire format, full process_list of {count} processes ({iterations} encodes each)")
+
+    json_time, encoded = timed(lambda: json.dumps(update).encode(), iterations)
+    json_size = len(encoded)
+    print(f"  json:     {json_size:9d} bytes/tick  {json_time * 1000:8.2f} ms/encode")
+
+    packed_time, packed = timed(lambda: monitor.pack_process_update(update, rows), iterations)
+    print(f"  columnar: {len(packed):9d} bytes/tick  {packed_time * 1000:8.2f} ms/encode")
+    print(f"  ratio:    {json_size / len(packed):9.2f}x smaller")
+
+
+def bench_compression(count=5000, ticks=20):
+    """Deflate a stream of process_list ticks the way a compressing client receives them"""
+    processes = synthetic_processes(count)
+    rows = {proc['pid']: proc for proc in processes}
+    print(f"Compression, full process_list of {count} processes over {ticks} ticks")
+
+    for encoding in ('json', 'columnar'):
+        compressor = monitor.ClientCompressor()
+        compressor.start()
+        raw_bytes = compressed_bytes = 0
+        started = time.process_time()
+        for seq in range(1, ticks + 1):
+            update = {
+                'type': 'full',
+                'seq': seq,
+                'order': list(rows),
+                'offset': 0,
+                'total': len(processes),
+                'processes': processes
+            }
+            if encoding == 'json':
+                raw = json.dumps(update, separators=(',', ':')).encode()
+            else:
+                raw = monitor.pack_process_update(update, rows)
+            raw_bytes += len(raw)
+            compressed_bytes += len(compressor.compress(raw))
+        cpu = (time.process_time() - started) / ticks
+        print(f"  {encoding + ':':9} {raw_bytes // ticks:9d} -> {compressed_bytes // ticks:8d} bytes/tick  "
+              f"({raw_bytes / compressed_bytes:6.1f}x, {cpu * 1000:.2f} ms/tick)")
+
+
+def bench_top_k(count=10000, k=20, iterations=50):
+    """Compare a full sort with the bounded heap selection used for top-K and table pages"""
+    processes = synthetic_processes(count)
+    for i, proc in enumerate(processes):
+        proc['cpu_percent'] = (i * 7919) % 1000 / 10
+    key = monitor.TOP_K_KEYS['cpu']
+    print(f"Top {k} of {count} processes by CPU ({iterations} selections each)")
+
+    sort_time, _ = timed(lambda: sorted(processes, key=key, reverse=True)[:k], iterations)
+    print(f"  sort:     {sort_time * 1000:8.2f} ms")
+    heap_time, _ = timed(lambda: monitor.heapq.nlargest(k, processes, key=key), iterations)
+    print(f"  heap:     {heap_time * 1000:8.2f} ms  ({sort_time / heap_time:.2f}x)")
+
+
+def bench_leaks(count=5000, scans=100):
+    """Time the per-PID RSS regression of the leak detector over a series of scans"""
+    processes = synthetic_processes(count)
+    for proc in processes:
+        proc['memory_mb'] = max(proc['memory_mb'], monitor.LEAK_MIN_MEMORY_MB)
+    detector = monitor.LeakDetector()
+    detector.update(processes, 0.0)  # first sight of each PID only starts its fit
+    print(f"Leak detection, {count} processes ({scans} scans)")
+
+    started = time.perf_counter()
+    for scan in range(1, scans + 1):
+        processes[scan % count]['memory_mb'] += 1
+        detector.update(processes, scan * monitor.PROCESS_INTERVAL)
+    elapsed = (time.perf_counter() - started) / scans
+    print(f"  per scan: {elapsed * 1000:8.2f} ms  ({elapsed / count * 1e6:.2f} us/process)")
+
+
+def bench_alerts(rules=500, process_rules=100, count=5000, ticks=50):
+    """Time alert rule evaluation per metrics tick and per process scan with many rules"""
+    specs = []
+    for i in range(rules):
+        metric = monitor.ALERT_METRICS[i % len(monitor.ALERT_METRICS)]
+        if i % 2:
+            specs.append({'name': f'anomaly_{i}', 'type': 'anomaly', 'metric': metric, 'z': 4})
+        else:
+            specs.append({'name': f'threshold_{i}', 'type': 'threshold', 'metric': metric, 'above': 90, 'for': 60})
+    for i in range(process_rules):
+        if i % 2:
+            specs.append({'name': f'rss_growth_{i}', 'type': 'rss_growth', 'mb_per_hour': 10 + i})
+        else:
+            specs.append({'name': f'zombie_{i}', 'type': 'zombie'})
+    engine = monitor.AlertEngine(monitor.load_alert_rules(specs))
+
+    processes = synthetic_processes(count)
+    for proc in processes[::500]:
+        proc['status'] = 'zombie'
+    metrics = monitor.take_snapshot(collect_processes=False).metrics
+    print(f"Alert evaluation, {rules} metric rules and {process_rules} process rules, {count} processes ({ticks} ticks)")
+
+    for label, metrics_updated in (('metrics', True), ('process', False)):
+        elapsed = 0.0
+        for version in range(ticks):
+            # A new snapshot per tick, as the sampler makes, so nothing is reused across ticks
+            snapshot = monitor.Snapshot(version, metrics, processes, time.time(), metrics_updated, not metrics_updated)
+            started = time.perf_counter()
+            engine.evaluate(snapshot)
+            elapsed += time.perf_counter() - started
+        per_tick = elapsed / ticks
+        print(f"  {label + ':':9} {per_tick * 1000:8.3f} ms/tick")
+
+
+def bench_startup(runs=5):
+    """Time a cold import of the module in fresh interpreters"""
+    print(f"Cold start, import in a new interpreter ({runs} runs)")
+    script = ("import time; started = time.perf_counter(); import enhanced_process_monitor; "
+              "print(time.perf_counter() - started)")
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        times.append(float(result.stdout.split()[-1]))
+    print(f"  import:   {min(times) * 1000:8.2f} ms best, {sum(times) / runs * 1000:8.2f} ms mean")
+
+
+def bench_page_load():
+    """Fetch the page and its local assets as a first visit and as a reload"""
+    client = monitor.app.test_client()
+    print("Page load, dashboard page and local assets")
+
+    for label, accept in (('identity', ''), ('gzip', 'gzip'), ('br', 'br, gzip')):
+        started = time.perf_counter()
+        page = client.get('/', headers={'Accept-Encoding': accept})
+        html = monitor.get_static_assets()[1].body.decode()
+        urls = re.findall(r'"(/static/[^"]+)"', html)
+        responses = [page] + [client.get(url, headers={'Accept-Encoding': accept}) for url in urls]
+        elapsed = time.perf_counter() - started
+        size = sum(len(response.data) for response in responses)
+        print(f"  {label + ':':9} {size:9d} bytes  {elapsed * 1000:8.2f} ms  ({len(responses)} requests)")
+
+    # A reload revalidates the page; versioned assets are cached and not requested at all
+    started = time.perf_counter()
+    reload = client.get('/', headers={'If-None-Match': page.headers['ETag']})
+    elapsed = time.perf_counter() - started
+    print(f"  reload:   {len(reload.data):9d} bytes  {elapsed * 1000:8.2f} ms  (status {reload.status_code})")
+    if not urls:
+        print("  no vendored assets, run 'python enhanced_process_monitor.py --vendor-assets'")
+
+
+# File opens and directory listings seen by the audit hook while counting is on
+syscall_counts = None
+
+
+def _count_syscalls(event, args):
+    if syscall_counts is not None and event in ('open', 'os.listdir', 'os.scandir'):
+        syscall_counts[event] = syscall_counts.get(event, 0) + 1
+
+
+def count_syscalls(func):
+    """Run func and return the number of files and directories it opened.
+
+    It runs once uncounted first, so one-off lookups that psutil caches
+    (boot time, the terminal map) don't count against either side.
+    """
+    global syscall_counts
+    try:
+        func()
+    except Exception:
+        pass
+    syscall_counts = {}
+    try:
+        func()
+    except Exception:
+        pass
+    counts, syscall_counts = syscall_counts, None
+    return sum(counts.values())
+
+
+def legacy_details(pid):
+    """The details read as they were done before batching: separate calls on a new Process"""
+    proc = psutil.Process(pid)
+    proc.as_dict(attrs=['pid', 'name', 'status', 'username', 'cpu_percent', 'memory_percent',
+                        'memory_info', 'num_threads', 'create_time', 'nice', 'ppid', 'cwd',
+                        'exe', 'cmdline', 'terminal'])
+    proc.cpu_times()
+    proc.cpu_times()
+    proc.io_counters()
+
+
+def legacy_action(pid):
+    """The start of a kill/suspend/resume request before batching"""
+    proc = psutil.Process(pid)
+    proc.name()
+    proc.send_signal(0)
+
+
+def bench_details_syscalls():
+    """Count /proc files opened per details or action request, before and after batching"""
+    sys.addaudithook(_count_syscalls)
+    monitor.take_snapshot()
+    pid = os.getpid()
+    monitor.process_handles.get(pid)  # as held by the sampler after a scan
+    print(f"Files opened per request for PID {pid}")
+
+    before = count_syscalls(lambda: legacy_details(pid))
+    after = count_syscalls(lambda: monitor.get_process_details(pid))
+    print(f"  details:  {before:4d} before  {after:4d} after")
+
+    before = count_syscalls(lambda: legacy_action(pid))
+    after = count_syscalls(lambda: (monitor.process_name(monitor.process_handles.get(pid)),
+                                    monitor.process_handles.get(pid).send_signal(0)))
+    print(f"  action:   {before:4d} before  {after:4d} after  (name lookup and signal)")
+
+
+BENCHMARKS = {
+    'collectors': bench_collectors,
+    'scan': bench_scan_workers,
+    'wire': bench_wire_format,
+    'topk': bench_top_k,
+    'compression': bench_compression,
+    'alerts': bench_alerts,
+    'leaks': bench_leaks,
+    'startup': bench_startup,
+    'page': bench_page_load,
+    'syscalls': bench_details_syscalls
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark {name!r}, choose from: {', '.join(BENCHMARKS)}")
+        BENCHMARKS[name]()
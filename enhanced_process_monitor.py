@@ -5,37 +5,99 @@ import os
 import signal
 import platform
 import datetime
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, jsonify, request
+import flask_socketio
 from flask_socketio import SocketIO
 import threading
 import logging
+import asyncio
+import sqlite3
+import struct
+import zlib
+import heapq
+import math
+import gzip
+import hashlib
+import mimetypes
+import urllib.request
+import sys
+import copy
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout  # not the builtin before Python 3.11
+
+try:
+    import pwd
+except ImportError:  # Not available on Windows, where the /proc collector is never used
+    pwd = None
+
+try:
+    import brotli
+except ImportError:  # Optional, assets are then served with gzip only
+    brotli = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app and SocketIO
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'process-monitor-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Create templates directory if it doesn't exist
-os.makedirs('templates', exist_ok=True)
-os.makedirs('static', exist_ok=True)
+# Server mode: 'threading' runs Flask-SocketIO, 'asyncio' runs python-socketio's AsyncServer
+SERVER_MODE = os.environ.get('PROCESS_MONITOR_SERVER', 'threading')
+ASYNC_HANDLER_WORKERS = 16     # threads running blocking socket handlers in asyncio mode
+
+# Set once the asyncio server is running
+async_server = None
+async_loop = None
+
+# Socket event handlers taking (sid, data), registered with whichever server runs
+socket_handlers = {}
+
+def socket_event(event):
+    """Register a Socket.IO event handler that takes the client's session id and payload"""
+    def decorator(handler):
+        socket_handlers[event] = handler
+        # Flask-SocketIO passes the session id through flask.request
+        socketio.on_event(event, lambda data=None: handler(request.sid, data))
+        return handler
+    return decorator
+
+def emit(event, data, to=None):
+    """Emit an event from any thread, to one session, a room or everyone"""
+    if async_server:
+        asyncio.run_coroutine_threadsafe(async_server.emit(event, data, to=to), async_loop)
+    else:
+        socketio.emit(event, data, to=to)
+
+def join_room(sid, room):
+    """Add a session to a room from any thread"""
+    if async_server:
+        asyncio.run_coroutine_threadsafe(async_server.enter_room(sid, room), async_loop)
+    else:
+        flask_socketio.join_room(room, sid=sid, namespace='/')
+
+def leave_room(sid, room):
+    """Remove a session from a room from any thread"""
+    if async_server:
+        asyncio.run_coroutine_threadsafe(async_server.leave_room(sid, room), async_loop)
+    else:
+        flask_socketio.leave_room(room, sid=sid, namespace='/')
 
-# Write HTML template
-with open('templates/index.html', 'w') as f:
-    f.write('''
-<!DOCTYPE html>
+# Dashboard page. vendor:<name> URLs are resolved by get_static_assets()
+INDEX_HTML = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Enhanced Process Monitor Dashboard</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <script src="https://cdn.socket.io/4.6.0/socket.io.min.js"></script>
+    <link href="vendor:bootstrap/bootstrap.min.css" rel="stylesheet">
+    <link rel="stylesheet" href="vendor:bootstrap-icons/bootstrap-icons.css">
+    <script src="vendor:chart.js/chart.umd.js"></script>
+    <script src="vendor:socket.io/socket.io.min.js"></script>
     <style>
         body {
             padding-top: 20px;
@@ -69,6 +131,17 @@ with open('templates/index.html', 'w') as f:
             font-size: 14px;
             color: #6c757d;
         }
+        .per-cpu-grid {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 2px;
+            justify-content: center;
+        }
+        .per-cpu-cell {
+            width: 10px;
+            height: 10px;
+            border-radius: 2px;
+        }
         .high-usage {
             color: #dc3545;
         }
@@ -166,6 +239,7 @@ with open('templates/index.html', 'w') as f:
         <div class="d-flex justify-content-between align-items-center mb-4">
             <h1>Enhanced Process Monitor Dashboard</h1>
             <div class="d-flex gap-2">
+                <span id="alert-count" class="badge bg-danger align-self-center d-none" title="Firing alerts"></span>
                 <div class="form-check form-switch mt-2">
                     <input class="form-check-input" type="checkbox" id="auto-refresh" checked>
                     <label class="form-check-label" for="auto-refresh">Auto Refresh</label>
@@ -192,6 +266,10 @@ with open('templates/index.html', 'w') as f:
                             <div id="cpu-progress" class="progress-bar" role="progressbar" style="width: 0%"></div>
                         </div>
                         <div class="mt-2 metric-label">Total CPU Usage</div>
+                        <div id="per-cpu" class="per-cpu-grid mt-2"></div>
+                        <div id="cpu-breakdown" class="mt-2 metric-label"></div>
+                        <div id="load-avg" class="metric-label"></div>
+                        <div id="pressure" class="metric-label"></div>
                     </div>
                 </div>
             </div>
@@ -254,6 +332,49 @@ with open('templates/index.html', 'w') as f:
             </div>
         </div>
         
+        <div class="row mb-4">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">Disks & Interfaces</h5>
+                        <button id="devices-toggle" class="btn btn-sm btn-outline-secondary">Show</button>
+                    </div>
+                    <div class="card-body d-none" id="devices-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>Disk</th>
+                                        <th>Read / Write</th>
+                                        <th>IOPS (R / W)</th>
+                                        <th>Await ms (R / W)</th>
+                                        <th>Busy %</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="io-disks">
+                                    <!-- Disk rows will be inserted here -->
+                                </tbody>
+                            </table>
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>Interface</th>
+                                        <th>Sent / Received</th>
+                                        <th>Packets/s (Tx / Rx)</th>
+                                        <th>Errors/s (In / Out)</th>
+                                        <th>Drops/s (In / Out)</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="io-nics">
+                                    <!-- Interface rows will be inserted here -->
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        
         <div class="row">
             <div class="col-12">
                 <div class="card">
@@ -300,6 +421,8 @@ with open('templates/index.html', 'w') as f:
                                             <li><a class="dropdown-item sort-item" data-sort="pid" data-order="desc" href="#">PID (Descending)</a></li>
                                             <li><a class="dropdown-item sort-item" data-sort="name" data-order="asc" href="#">Name (A-Z)</a></li>
                                             <li><a class="dropdown-item sort-item" data-sort="name" data-order="desc" href="#">Name (Z-A)</a></li>
+                                            <li><a class="dropdown-item sort-item" data-sort="io" data-order="desc" href="#">Disk I/O (High to Low)</a></li>
+                                            <li><a class="dropdown-item sort-item" data-sort="ctx_switches" data-order="desc" href="#">Context Switches (High to Low)</a></li>
                                         </ul>
                                     </div>
                                 </div>
@@ -320,6 +443,8 @@ with open('templates/index.html', 'w') as f:
                                         <th class="sortable" data-sort="memory_mb">Memory (MB) <span class="sort-icon"></span></th>
                                         <th class="sortable" data-sort="user">User <span class="sort-icon"></span></th>
                                         <th class="sortable" data-sort="threads">Threads <span class="sort-icon"></span></th>
+                                        <th class="sortable" data-sort="io">Disk I/O (R / W) <span class="sort-icon"></span></th>
+                                        <th class="sortable" data-sort="ctx_switches">Ctx Sw/s <span class="sort-icon"></span></th>
                                         <th>Actions</th>
                                     </tr>
                                 </thead>
@@ -328,6 +453,171 @@ with open('templates/index.html', 'w') as f:
                                 </tbody>
                             </table>
                         </div>
+                        <div class="d-flex justify-content-between align-items-center mt-2">
+                            <div id="process-page-info" class="metric-label"></div>
+                            <div class="btn-group">
+                                <button id="prev-page" class="btn btn-sm btn-outline-secondary" title="Previous Page">
+                                    <i class="bi bi-chevron-left"></i>
+                                </button>
+                                <button id="next-page" class="btn btn-sm btn-outline-secondary" title="Next Page">
+                                    <i class="bi bi-chevron-right"></i>
+                                </button>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">Process Tree</h5>
+                        <button id="tree-toggle" class="btn btn-sm btn-outline-secondary">Show</button>
+                    </div>
+                    <div class="card-body d-none" id="tree-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>Name</th>
+                                        <th>PID</th>
+                                        <th>User</th>
+                                        <th>CPU %</th>
+                                        <th>Memory (MB)</th>
+                                        <th>Subtree CPU %</th>
+                                        <th>Subtree Memory (MB)</th>
+                                        <th>Subtree Processes</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="process-tree">
+                                    <!-- Process tree rows will be inserted here -->
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">Process Groups</h5>
+                        <div class="d-flex gap-2">
+                            <select id="group-by" class="form-select form-select-sm">
+                                <option value="username">By User</option>
+                                <option value="name">By Name</option>
+                                <option value="cgroup">By Cgroup</option>
+                                <option value="parent">By Parent</option>
+                            </select>
+                            <select id="group-sort" class="form-select form-select-sm">
+                                <option value="cpu_percent_sum">Total CPU</option>
+                                <option value="memory_mb_sum">Total Memory</option>
+                                <option value="num_threads_sum">Total Threads</option>
+                                <option value="count">Processes</option>
+                            </select>
+                            <button id="groups-toggle" class="btn btn-sm btn-outline-secondary">Show</button>
+                        </div>
+                    </div>
+                    <div class="card-body d-none" id="groups-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>Group</th>
+                                        <th>Processes</th>
+                                        <th>CPU % (Total / Max)</th>
+                                        <th>Memory MB (Total / Max)</th>
+                                        <th>Threads (Total / Max)</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="process-groups">
+                                    <!-- Process group rows will be inserted here -->
+                                </tbody>
+                            </table>
+                        </div>
+                        <div id="process-groups-info" class="metric-label"></div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">Top Processes</h5>
+                        <div class="d-flex gap-2">
+                            <select id="top-key" class="form-select form-select-sm">
+                                <option value="cpu">By CPU</option>
+                                <option value="memory_mb">By Memory</option>
+                                <option value="threads">By Threads</option>
+                                <option value="io">By Disk I/O</option>
+                                <option value="ctx_switches">By Context Switches</option>
+                            </select>
+                            <select id="top-k" class="form-select form-select-sm">
+                                <option value="10">Top 10</option>
+                                <option value="20" selected>Top 20</option>
+                                <option value="50">Top 50</option>
+                            </select>
+                            <button id="top-toggle" class="btn btn-sm btn-outline-secondary">Show</button>
+                        </div>
+                    </div>
+                    <div class="card-body d-none" id="top-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>PID</th>
+                                        <th>Name</th>
+                                        <th>User</th>
+                                        <th>CPU %</th>
+                                        <th>Memory (MB)</th>
+                                        <th>Threads</th>
+                                        <th>Disk I/O (R / W)</th>
+                                        <th>Ctx Sw/s</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="process-top">
+                                    <!-- Top process rows will be inserted here -->
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">Memory Leaks</h5>
+                        <button id="leaks-toggle" class="btn btn-sm btn-outline-secondary">Show</button>
+                    </div>
+                    <div class="card-body d-none" id="leaks-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>PID</th>
+                                        <th>Name</th>
+                                        <th>User</th>
+                                        <th>Memory (MB)</th>
+                                        <th>Growth (MB/h)</th>
+                                        <th>Fit (R²)</th>
+                                        <th>Growing For</th>
+                                    </tr>
+                                </thead>
+                                <tbody id="process-leaks">
+                                    <!-- Leaking process rows will be inserted here -->
+                                </tbody>
+                            </table>
+                        </div>
+                        <div id="process-leaks-info" class="metric-label"></div>
                     </div>
                 </div>
             </div>
@@ -472,7 +762,7 @@ with open('templates/index.html', 'w') as f:
     <div class="toast-container"></div>
     
     <!-- Bootstrap JS Bundle with Popper -->
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
+    <script src="vendor:bootstrap/bootstrap.bundle.min.js"></script>
     
     <script>
         // Connect to Socket.IO server
@@ -480,6 +770,8 @@ with open('templates/index.html', 'w') as f:
         
         // Global variables
         let allProcesses = [];
+        let processIndex = new Map();
+        let processSeq = null;
         let currentFilters = {
             search: '',
             status: 'all',
@@ -489,6 +781,16 @@ with open('templates/index.html', 'w') as f:
             field: 'cpu',
             order: 'desc'
         };
+        let currentPage = {
+            offset: 0,
+            limit: 50,
+            total: 0
+        };
+        let searchTimer = null;
+        
+        // Chart history: points shown and timestamp of the newest one
+        const chartPoints = 150;
+        let lastChartTimestamp = 0;
         let selectedPid = null;
         let autoRefresh = true;
         
@@ -510,11 +812,11 @@ with open('templates/index.html', 'w') as f:
         const resourceChart = new Chart(resourceCtx, {
             type: 'line',
             data: {
-                labels: Array(20).fill(''),
+                labels: Array(chartPoints).fill(''),
                 datasets: [
                     {
                         label: 'CPU Usage %',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(255, 99, 132, 1)',
                         backgroundColor: 'rgba(255, 99, 132, 0.2)',
                         tension: 0.4,
@@ -522,7 +824,7 @@ with open('templates/index.html', 'w') as f:
                     },
                     {
                         label: 'Memory Usage %',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(54, 162, 235, 1)',
                         backgroundColor: 'rgba(54, 162, 235, 0.2)',
                         tension: 0.4,
@@ -559,11 +861,11 @@ with open('templates/index.html', 'w') as f:
         const ioChart = new Chart(ioCtx, {
             type: 'line',
             data: {
-                labels: Array(20).fill(''),
+                labels: Array(chartPoints).fill(''),
                 datasets: [
                     {
                         label: 'Disk Read (MB/s)',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(255, 159, 64, 1)',
                         backgroundColor: 'rgba(255, 159, 64, 0.2)',
                         tension: 0.4,
@@ -571,7 +873,7 @@ with open('templates/index.html', 'w') as f:
                     },
                     {
                         label: 'Disk Write (MB/s)',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(75, 192, 192, 1)',
                         backgroundColor: 'rgba(75, 192, 192, 0.2)',
                         tension: 0.4,
@@ -579,7 +881,7 @@ with open('templates/index.html', 'w') as f:
                     },
                     {
                         label: 'Network Sent (MB/s)',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(153, 102, 255, 1)',
                         backgroundColor: 'rgba(153, 102, 255, 0.2)',
                         tension: 0.4,
@@ -587,7 +889,7 @@ with open('templates/index.html', 'w') as f:
                     },
                     {
                         label: 'Network Received (MB/s)',
-                        data: Array(20).fill(0),
+                        data: Array(chartPoints).fill(0),
                         borderColor: 'rgba(201, 203, 207, 1)',
                         backgroundColor: 'rgba(201, 203, 207, 0.2)',
                         tension: 0.4,
@@ -619,13 +921,168 @@ with open('templates/index.html', 'w') as f:
             }
         });
         
+        // Compact wire format: the schema arrives once, packed frames carry only values
+        let wireSchema = null;
+        const textDecoder = new TextDecoder();
+        
+        socket.on('wire_schema', function(schema) {
+            wireSchema = schema;
+        });
+        
+        // Little-endian reader over a packed frame
+        function frameReader(buffer) {
+            const view = new DataView(buffer);
+            let pos = 0;
+            const read = {
+                u8: () => { const value = view.getUint8(pos); pos += 1; return value; },
+                u16: () => { const value = view.getUint16(pos, true); pos += 2; return value; },
+                u32: () => { const value = view.getUint32(pos, true); pos += 4; return value; },
+                f32: () => { const value = view.getFloat32(pos, true); pos += 4; return value; },
+                f64: () => { const value = view.getFloat64(pos, true); pos += 8; return value; },
+                text: length => { const value = textDecoder.decode(new Uint8Array(buffer, pos, length)); pos += length; return value; }
+            };
+            read.str = read.u16;
+            return read;
+        }
+        
+        function decodeMetricsFrame(buffer) {
+            const read = frameReader(buffer);
+            const metrics = {};
+            wireSchema.metrics.forEach(([field, type]) => {
+                metrics[field] = read[type]();
+            });
+            // Array fields follow the scalars as a u16 count and that many f32 values
+            wireSchema.metrics_arrays.forEach(field => {
+                metrics[field] = Float32Array.from({ length: read.u16() }, read.f32);
+            });
+            return metrics;
+        }
+        
+        // Decode a columnar process frame into the same shape as a JSON process_list update
+        function decodeProcessFrame(buffer) {
+            const read = frameReader(buffer);
+            read.u8();  // format version
+            const full = read.u8() === 0;
+            const update = {
+                type: full ? 'full' : 'delta',
+                seq: read.u32(),
+                base: read.u32(),
+                offset: read.u32(),
+                total: read.u32()
+            };
+            const orderCount = read.u32();
+            const removedCount = read.u32();
+            const rowCount = read.u32();
+            const stringCount = read.u32();
+            
+            const strings = [];
+            for (let i = 0; i < stringCount; i++) {
+                strings.push(read.text(read.u16()));
+            }
+            update.order = Array.from({ length: orderCount }, read.u32);
+            update.removed = Array.from({ length: removedCount }, read.u32);
+            
+            const rows = Array.from({ length: rowCount }, () => ({}));
+            wireSchema.process.forEach(([field, type, scale]) => {
+                for (let i = 0; i < rowCount; i++) {
+                    const value = read[type]();
+                    rows[i][field] = type === 'str' ? (strings[value] || null) : value / scale;
+                }
+            });
+            
+            // Changed processes arrive as whole rows and simply replace the old ones
+            if (full) {
+                update.processes = rows;
+                update.order = rows.map(row => row.pid);
+            } else {
+                update.added = rows;
+                update.changed = [];
+            }
+            return update;
+        }
+        
+        // Large payloads may arrive deflated. Inflating is asynchronous, so frames that
+        // must stay in order go through one promise queue.
+        let receiveQueue = Promise.resolve();
+        const inOrder = handler => (...args) => {
+            receiveQueue = receiveQueue.then(() => handler(...args)).catch(error => console.error(error));
+        };
+        
+        // One raw inflate stream per connection, mirroring the server's deflate stream
+        let inflater = null;
+        function createInflater() {
+            const stream = new DecompressionStream('deflate-raw');
+            return { writer: stream.writable.getWriter(), reader: stream.readable.getReader() };
+        }
+        
+        // Every frame is sync-flushed, so reading `size` bytes returns exactly this message
+        async function inflateFrame(frame) {
+            if (frame.reset || !inflater) {
+                inflater = createInflater();
+            }
+            inflater.writer.write(new Uint8Array(frame.data));
+            
+            const output = new Uint8Array(frame.size);
+            let received = 0;
+            while (received < frame.size) {
+                const { value, done } = await inflater.reader.read();
+                if (done) {
+                    throw new Error('compressed stream ended early');
+                }
+                output.set(value, received);
+                received += value.length;
+            }
+            return output.buffer;
+        }
+        
+        const compressedHandlers = {};
+        socket.on('compressed', inOrder(async function(frame) {
+            const payload = await inflateFrame(frame);
+            const handler = compressedHandlers[frame.event];
+            if (handler) {
+                // The priming frame has no event, its content only fills the window
+                handler(frame.json ? JSON.parse(textDecoder.decode(payload)) : payload);
+            }
+        }));
+        
+        // Restore this page's encoding, query and subscriptions after (re)connecting
+        socket.on('connect', function() {
+            inflater = null;
+            socket.emit('set_encoding', {
+                formats: ['columnar', 'json'],
+                compression: 'DecompressionStream' in window ? ['deflate'] : []
+            });
+            sendProcessQuery();
+            if (!autoRefresh) {
+                socket.emit('set_auto_refresh', { enabled: false });
+            }
+            if (devicesVisible) {
+                socket.emit('subscribe', { stream: 'io_devices' });
+            }
+            if (treeVisible) {
+                socket.emit('subscribe', { stream: 'process_tree' });
+            }
+            if (groupsVisible) {
+                socket.emit('set_group_by', groupQuery());
+                socket.emit('subscribe', { stream: 'process_groups' });
+            }
+            if (topVisible) {
+                socket.emit('set_top_k', topQuery());
+                socket.emit('subscribe', { stream: 'process_top' });
+            }
+            if (leaksVisible) {
+                socket.emit('subscribe', { stream: 'process_leaks' });
+            }
+        });
+        
         // Update UI with system metrics
-        socket.on('system_metrics', function(data) {
+        function updateSystemMetrics(data) {
             // Update CPU usage
             document.getElementById('cpu-usage').textContent = data.cpu.toFixed(1) + '%';
             document.getElementById('cpu-progress').style.width = data.cpu + '%';
             updateMetricColor('cpu-usage', data.cpu);
             updateProgressBarColor('cpu-progress', data.cpu);
+            updateCpuDetails(data);
             
             // Update memory usage
             document.getElementById('memory-usage').textContent = data.memory_percent.toFixed(1) + '%';
@@ -643,8 +1100,12 @@ with open('templates/index.html', 'w') as f:
             document.getElementById('net-sent').textContent = data.net_sent.toFixed(2) + ' MB/s';
             document.getElementById('net-recv').textContent = data.net_recv.toFixed(2) + ' MB/s';
             
-            // Update charts
-            const timestamp = new Date().toLocaleTimeString();
+            // Update charts, skipping samples already drawn from the backfill
+            if (data.timestamp <= lastChartTimestamp) {
+                return;
+            }
+            lastChartTimestamp = data.timestamp;
+            const timestamp = new Date(data.timestamp * 1000).toLocaleTimeString();
             
             // Update resource chart
             resourceChart.data.labels.shift();
@@ -667,22 +1128,155 @@ with open('templates/index.html', 'w') as f:
             ioChart.data.datasets[3].data.shift();
             ioChart.data.datasets[3].data.push(data.net_recv);
             ioChart.update();
+        }
+        
+        // JSON metrics carry the array fields as packed float32 bytes
+        function metricsArray(value) {
+            return value instanceof ArrayBuffer ? new Float32Array(value) : Float32Array.from(value || []);
+        }
+        
+        function updateCpuDetails(data) {
+            const perCpu = metricsArray(data.per_cpu);
+            const grid = document.getElementById('per-cpu');
+            while (grid.children.length > perCpu.length) {
+                grid.lastChild.remove();
+            }
+            while (grid.children.length < perCpu.length) {
+                const cell = document.createElement('div');
+                cell.className = 'per-cpu-cell';
+                grid.appendChild(cell);
+            }
+            perCpu.forEach((value, i) => {
+                const cell = grid.children[i];
+                cell.className = 'per-cpu-cell ' + usageBackground(value);
+                cell.title = `CPU ${i}: ${value.toFixed(1)}%`;
+            });
+            
+            // Field names come with the wire schema, which arrives right after connect
+            if (!wireSchema) {
+                return;
+            }
+            const breakdown = metricsArray(data.cpu_breakdown);
+            document.getElementById('cpu-breakdown').textContent = wireSchema.cpu_breakdown
+                .map((field, i) => [field, breakdown[i]])
+                .filter(([field, value]) => field !== 'idle' && value >= 0.1)
+                .map(([field, value]) => `${field} ${value.toFixed(1)}%`)
+                .join(' · ');
+            
+            const load = metricsArray(data.load_avg);
+            document.getElementById('load-avg').textContent = load.length
+                ? 'Load ' + Array.from(load, value => value.toFixed(2)).join(' ')
+                : '';
+            
+            // PSI stall percentages, NaN on kernels without /proc/pressure
+            const pressure = metricsArray(data.pressure);
+            const stalls = wireSchema.pressure
+                .map((field, i) => [field, pressure[i]])
+                .filter(([field, value]) => !Number.isNaN(value));
+            document.getElementById('pressure').textContent = stalls.length
+                ? 'Pressure ' + stalls.map(([field, value]) => `${field.replace('_', ' ')} ${value.toFixed(1)}%`).join(' · ')
+                : '';
+        }
+        
+        socket.on('system_metrics', updateSystemMetrics);
+        socket.on('system_metrics_packed', function(buffer) {
+            updateSystemMetrics(decodeMetricsFrame(buffer));
+        });
+        
+        // Backfill charts with recent history sent on connect
+        socket.on('metrics_history', function(history) {
+            const timestamps = new Float64Array(history.timestamps);
+            const column = name => Array.from(new Float32Array(history[name]));
+            
+            // Keep the newest chartPoints samples, padding the front if there are fewer
+            const pad = values => {
+                const recent = values.slice(-chartPoints);
+                return Array(chartPoints - recent.length).fill(0).concat(recent);
+            };
+            const labels = Array.from(timestamps, ts => new Date(ts * 1000).toLocaleTimeString());
+            
+            resourceChart.data.labels = pad(labels).map(label => label || '');
+            resourceChart.data.datasets[0].data = pad(column('cpu'));
+            resourceChart.data.datasets[1].data = pad(column('memory_percent'));
+            resourceChart.update();
+            
+            ioChart.data.labels = resourceChart.data.labels.slice();
+            ioChart.data.datasets[0].data = pad(column('disk_read'));
+            ioChart.data.datasets[1].data = pad(column('disk_write'));
+            ioChart.data.datasets[2].data = pad(column('net_sent'));
+            ioChart.data.datasets[3].data = pad(column('net_recv'));
+            ioChart.update();
+            
+            if (timestamps.length) {
+                lastChartTimestamp = timestamps[timestamps.length - 1];
+            }
         });
         
+        // Format a bytes/s rate for the process tables
+        function formatRate(bytesPerSecond) {
+            if (bytesPerSecond >= 1024 * 1024) {
+                return (bytesPerSecond / (1024 * 1024)).toFixed(1) + ' MB/s';
+            }
+            if (bytesPerSecond >= 1024) {
+                return (bytesPerSecond / 1024).toFixed(1) + ' KB/s';
+            }
+            return bytesPerSecond + ' B/s';
+        }
+        
         // Update process table
-        socket.on('process_list', function(processes) {
-            // Store all processes
-            allProcesses = processes;
+        function applyProcessUpdate(update) {
+            if (update.type === 'full') {
+                // Full resync: rebuild the index from scratch
+                processIndex = new Map(update.processes.map(process => [process.pid, process]));
+            } else {
+                // Delta against a snapshot we never saw, ask for a full resync
+                if (update.base !== processSeq) {
+                    socket.emit('request_process_list', { full: true });
+                    return;
+                }
+                
+                // Patch changed rows in place
+                update.changed.forEach(change => {
+                    const process = processIndex.get(change.pid);
+                    if (process) {
+                        Object.assign(process, change);
+                    }
+                });
+                
+                update.removed.forEach(pid => processIndex.delete(pid));
+                update.added.forEach(process => processIndex.set(process.pid, process));
+            }
+            processSeq = update.seq;
+            
+            // The server has already filtered, sorted and paginated the rows
+            allProcesses = update.order.map(pid => processIndex.get(pid));
+            currentPage.offset = update.offset;
+            currentPage.total = update.total;
             
-            // Apply filters and sort
             updateProcessTable();
             
             // Stop refresh animation if it's running
             const refreshBtn = document.getElementById('refresh-btn');
             refreshBtn.querySelector('.refresh-btn-container').classList.remove('refreshing');
-        });
+        }
+        
+        function applyPackedProcessUpdate(buffer) {
+            applyProcessUpdate(decodeProcessFrame(buffer));
+        }
+        
+        socket.on('process_list', inOrder(applyProcessUpdate));
+        socket.on('process_list_packed', inOrder(applyPackedProcessUpdate));
+        compressedHandlers.process_list = applyProcessUpdate;
+        compressedHandlers.process_list_packed = applyPackedProcessUpdate;
         
         // Process details response
+        // PID shown in the details modal, so late sections for another process are ignored
+        let detailsPid = null;
+        const detailSectionElements = {
+            connections: 'detail-connections',
+            open_files: 'detail-open-files'
+        };
+        
         socket.on('process_details', function(details) {
             if (details.error) {
                 showToast('Error', details.error, 'danger');
@@ -705,9 +1299,13 @@ with open('templates/index.html', 'w') as f:
             document.getElementById('detail-io-read').textContent = details.io_read || 'N/A';
             document.getElementById('detail-io-write').textContent = details.io_write || 'N/A';
             document.getElementById('detail-cpu-times').textContent = details.cpu_times || 'N/A';
-            document.getElementById('detail-connections').textContent = details.connections || '0';
             document.getElementById('detail-cmdline').textContent = details.cmdline || 'N/A';
-            document.getElementById('detail-open-files').textContent = details.open_files || 'None';
+            
+            // Expensive sections follow as process_details_section events
+            detailsPid = details.pid;
+            (details.pending_sections || []).forEach(section => {
+                document.getElementById(detailSectionElements[section]).textContent = 'Loading...';
+            });
             
             // Show the modal
             const processDetailsModal = new bootstrap.Modal(document.getElementById('processDetailsModal'));
@@ -728,105 +1326,333 @@ with open('templates/index.html', 'w') as f:
             };
         });
         
-        // Process action responses
-        socket.on('process_killed', function(data) {
-            if (data.success) {
-                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been terminated.`, 'success');
-                // Request updated process list
-                socket.emit('request_process_list');
-            } else {
-                showToast('Error', `Failed to terminate process: ${data.error}`, 'danger');
+        socket.on('process_details_section', function(data) {
+            const elementId = detailSectionElements[data.section];
+            if (data.pid === detailsPid && elementId) {
+                document.getElementById(elementId).textContent = data.value;
             }
         });
         
-        socket.on('process_suspended', function(data) {
-            if (data.success) {
-                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been suspended.`, 'info');
-                // Request updated process list
-                socket.emit('request_process_list');
+        // Server-side alerts: a toast when one fires or resolves, and a count of those still firing
+        const activeAlerts = new Map();
+        const alertToastTypes = { critical: 'danger', warning: 'warning', info: 'info' };
+        
+        function updateAlertCount() {
+            const badge = document.getElementById('alert-count');
+            badge.textContent = `${activeAlerts.size} alert${activeAlerts.size === 1 ? '' : 's'}`;
+            badge.title = Array.from(activeAlerts.values(), alert => alert.message).join('; ');
+            badge.classList.toggle('d-none', activeAlerts.size === 0);
+        }
+        
+        socket.on('active_alerts', function(alerts) {
+            activeAlerts.clear();
+            alerts.forEach(alert => activeAlerts.set(alert.id, alert));
+            updateAlertCount();
+        });
+        
+        socket.on('alert', function(alert) {
+            if (alert.state === 'firing') {
+                activeAlerts.set(alert.id, alert);
+                showToast(`Alert: ${alert.rule}`, alert.message, alertToastTypes[alert.severity]);
             } else {
-                showToast('Error', `Failed to suspend process: ${data.error}`, 'danger');
+                activeAlerts.delete(alert.id);
+                showToast(`Resolved: ${alert.rule}`, alert.message, 'success');
             }
+            updateAlertCount();
         });
         
-        socket.on('process_resumed', function(data) {
-            if (data.success) {
-                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been resumed.`, 'success');
-                // Request updated process list
-                socket.emit('request_process_list');
-            } else {
-                showToast('Error', `Failed to resume process: ${data.error}`, 'danger');
+        // Per-disk and per-interface rates, streamed only while the card is open
+        let devicesVisible = false;
+        
+        function updateIoDevices(devices) {
+            if (!devicesVisible) {
+                return;
             }
+            document.getElementById('io-disks').innerHTML = devices.disks.map(disk => `
+                <tr>
+                    <td>${disk.name}</td>
+                    <td>${disk.read_mb.toFixed(2)} / ${disk.write_mb.toFixed(2)} MB/s</td>
+                    <td>${disk.read_iops.toFixed(0)} / ${disk.write_iops.toFixed(0)}</td>
+                    <td>${disk.read_await_ms.toFixed(1)} / ${disk.write_await_ms.toFixed(1)}</td>
+                    <td>${disk.busy_percent === null ? 'N/A' : disk.busy_percent.toFixed(1) + '%'}</td>
+                </tr>`).join('');
+            document.getElementById('io-nics').innerHTML = devices.nics.map(nic => `
+                <tr>
+                    <td>${nic.name}</td>
+                    <td>${nic.sent_mb.toFixed(2)} / ${nic.recv_mb.toFixed(2)} MB/s</td>
+                    <td>${nic.packets_sent.toFixed(0)} / ${nic.packets_recv.toFixed(0)}</td>
+                    <td class="${nic.errors_in + nic.errors_out > 0 ? 'high-usage' : ''}">${nic.errors_in.toFixed(1)} / ${nic.errors_out.toFixed(1)}</td>
+                    <td class="${nic.drops_in + nic.drops_out > 0 ? 'medium-usage' : ''}">${nic.drops_in.toFixed(1)} / ${nic.drops_out.toFixed(1)}</td>
+                </tr>`).join('');
+        }
+        
+        socket.on('io_devices', updateIoDevices);
+        
+        document.getElementById('devices-toggle').addEventListener('click', function() {
+            devicesVisible = !devicesVisible;
+            this.textContent = devicesVisible ? 'Hide' : 'Show';
+            document.getElementById('devices-body').classList.toggle('d-none', !devicesVisible);
+            socket.emit(devicesVisible ? 'subscribe' : 'unsubscribe', { stream: 'io_devices' });
         });
         
-        // Filter processes based on current filters and sort
-        function updateProcessTable() {
-            const filteredProcesses = allProcesses.filter(process => {
-                // Apply search filter
-                const searchMatch = 
-                    process.name.toLowerCase().includes(currentFilters.search.toLowerCase()) || 
-                    process.pid.toString().includes(currentFilters.search) ||
-                    (process.username && process.username.toLowerCase().includes(currentFilters.search.toLowerCase()));
-                
-                // Apply status filter
-                const statusMatch = currentFilters.status === 'all' || process.status === currentFilters.status;
-                
-                // Apply resource filter
-                let resourceMatch = true;
-                if (currentFilters.resource === 'high-cpu') {
-                    resourceMatch = process.cpu_percent > 10;
-                } else if (currentFilters.resource === 'high-memory') {
-                    resourceMatch = process.memory_percent > 10;
-                }
-                
-                return searchMatch && statusMatch && resourceMatch;
-            });
-            
-            // Sort processes
-            filteredProcesses.sort((a, b) => {
-                let comparison = 0;
-                
-                switch (currentSort.field) {
-                    case 'pid':
-                        comparison = a.pid - b.pid;
-                        break;
-                    case 'name':
-                        comparison = a.name.localeCompare(b.name);
-                        break;
-                    case 'status':
-                        comparison = a.status.localeCompare(b.status);
-                        break;
-                    case 'cpu':
-                        comparison = a.cpu_percent - b.cpu_percent;
-                        break;
-                    case 'memory':
-                        comparison = a.memory_percent - b.memory_percent;
-                        break;
-                    case 'memory_mb':
-                        comparison = a.memory_mb - b.memory_mb;
-                        break;
-                    case 'user':
-                        comparison = (a.username || '').localeCompare(b.username || '');
-                        break;
-                    case 'threads':
-                        comparison = a.num_threads - b.num_threads;
-                        break;
-                    default:
-                        comparison = a.cpu_percent - b.cpu_percent;
+        // Process tree, rendered from server-side subtrees with rolled up totals
+        let treeVisible = false;
+        
+        function appendTreeRows(tableBody, nodes, level) {
+            nodes.forEach(node => {
+                const row = document.createElement('tr');
+                const open = node.children !== null;
+                const toggle = node.child_count
+                    ? `<a href="#" class="tree-node text-decoration-none" data-pid="${node.pid}" data-open="${open}">
+                           <i class="bi bi-${open ? 'caret-down-fill' : 'caret-right-fill'}"></i></a>`
+                    : '<i class="bi bi-dot"></i>';
+                row.innerHTML = `
+                    <td style="padding-left: ${level * 20 + 8}px">${toggle} ${node.name}${node.child_count ? ` <span class="metric-label">(${node.child_count})</span>` : ''}</td>
+                    <td>${node.pid}</td>
+                    <td>${node.username || 'N/A'}</td>
+                    <td>${node.cpu_percent.toFixed(1)}%</td>
+                    <td>${node.memory_mb.toFixed(1)}</td>
+                    <td>${node.subtree_cpu_percent.toFixed(1)}%</td>
+                    <td>${node.subtree_memory_mb.toFixed(1)}</td>
+                    <td>${node.subtree_processes}</td>
+                `;
+                tableBody.appendChild(row);
+                if (open) {
+                    appendTreeRows(tableBody, node.children, level + 1);
                 }
-                
-                return currentSort.order === 'asc' ? comparison : -comparison;
             });
-            
-            // Update table
-            const tableBody = document.getElementById('process-table');
+        }
+        
+        function updateProcessTree(tree) {
+            if (!treeVisible) {
+                return;
+            }
+            const tableBody = document.getElementById('process-tree');
             tableBody.innerHTML = '';
+            appendTreeRows(tableBody, tree.nodes, 0);
             
-            // Add rows
-            filteredProcesses.forEach(process => {
-                const row = document.createElement('tr');
-                row.classList.add('process-row');
-                row.dataset.pid = process.pid;
+            tableBody.querySelectorAll('.tree-node').forEach(link => {
+                link.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    socket.emit('set_tree_expanded', {
+                        pid: parseInt(this.dataset.pid),
+                        expanded: this.dataset.open !== 'true'
+                    });
+                });
+            });
+        }
+        
+        socket.on('process_tree', inOrder(updateProcessTree));
+        compressedHandlers.process_tree = updateProcessTree;
+        
+        document.getElementById('tree-toggle').addEventListener('click', function() {
+            treeVisible = !treeVisible;
+            this.textContent = treeVisible ? 'Hide' : 'Show';
+            document.getElementById('tree-body').classList.toggle('d-none', !treeVisible);
+            socket.emit(treeVisible ? 'subscribe' : 'unsubscribe', { stream: 'process_tree' });
+        });
+        
+        // Process groups, aggregated on the server for the selected grouping
+        let groupsVisible = false;
+        
+        function groupQuery() {
+            return {
+                by: document.getElementById('group-by').value,
+                sort: document.getElementById('group-sort').value
+            };
+        }
+        
+        function updateProcessGroups(result) {
+            if (!groupsVisible) {
+                return;
+            }
+            const tableBody = document.getElementById('process-groups');
+            tableBody.innerHTML = '';
+            result.groups.forEach(group => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${group.label}</td>
+                    <td>${group.count}</td>
+                    <td>${group.cpu_percent_sum.toFixed(1)}% / ${group.cpu_percent_max.toFixed(1)}%</td>
+                    <td>${group.memory_mb_sum.toFixed(1)} / ${group.memory_mb_max.toFixed(1)}</td>
+                    <td>${group.num_threads_sum} / ${group.num_threads_max}</td>
+                `;
+                tableBody.appendChild(row);
+            });
+            document.getElementById('process-groups-info').textContent = `Showing ${result.groups.length} of ${result.total} groups`;
+        }
+        
+        socket.on('process_groups', inOrder(updateProcessGroups));
+        compressedHandlers.process_groups = updateProcessGroups;
+        
+        ['group-by', 'group-sort'].forEach(id => {
+            document.getElementById(id).addEventListener('change', function() {
+                socket.emit('set_group_by', groupQuery());
+            });
+        });
+        
+        document.getElementById('groups-toggle').addEventListener('click', function() {
+            groupsVisible = !groupsVisible;
+            this.textContent = groupsVisible ? 'Hide' : 'Show';
+            document.getElementById('groups-body').classList.toggle('d-none', !groupsVisible);
+            if (groupsVisible) {
+                socket.emit('set_group_by', groupQuery());
+            }
+            socket.emit(groupsVisible ? 'subscribe' : 'unsubscribe', { stream: 'process_groups' });
+        });
+        
+        // Top processes, selected on the server with hysteresis so rows don't flicker
+        let topVisible = false;
+        
+        function topQuery() {
+            return {
+                key: document.getElementById('top-key').value,
+                k: parseInt(document.getElementById('top-k').value)
+            };
+        }
+        
+        function updateProcessTop(result) {
+            if (!topVisible) {
+                return;
+            }
+            const tableBody = document.getElementById('process-top');
+            tableBody.innerHTML = '';
+            result.processes.forEach(process => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${process.pid}</td>
+                    <td>${process.name}</td>
+                    <td>${process.username || 'N/A'}</td>
+                    <td>${process.cpu_percent.toFixed(1)}%</td>
+                    <td>${process.memory_mb.toFixed(1)}</td>
+                    <td>${process.num_threads}</td>
+                    <td>${formatRate(process.io_read_rate)} / ${formatRate(process.io_write_rate)}</td>
+                    <td>${process.ctx_switch_rate}</td>
+                `;
+                tableBody.appendChild(row);
+            });
+        }
+        
+        socket.on('process_top', inOrder(updateProcessTop));
+        compressedHandlers.process_top = updateProcessTop;
+        
+        ['top-key', 'top-k'].forEach(id => {
+            document.getElementById(id).addEventListener('change', function() {
+                socket.emit('set_top_k', topQuery());
+            });
+        });
+        
+        document.getElementById('top-toggle').addEventListener('click', function() {
+            topVisible = !topVisible;
+            this.textContent = topVisible ? 'Hide' : 'Show';
+            document.getElementById('top-body').classList.toggle('d-none', !topVisible);
+            if (topVisible) {
+                socket.emit('set_top_k', topQuery());
+            }
+            socket.emit(topVisible ? 'subscribe' : 'unsubscribe', { stream: 'process_top' });
+        });
+        
+        // Processes whose RSS has kept growing, ranked on the server by growth rate
+        let leaksVisible = false;
+        
+        function formatDuration(seconds) {
+            if (seconds >= 3600) {
+                return (seconds / 3600).toFixed(1) + ' h';
+            }
+            return Math.round(seconds / 60) + ' min';
+        }
+        
+        function updateProcessLeaks(result) {
+            if (!leaksVisible) {
+                return;
+            }
+            document.getElementById('process-leaks').innerHTML = result.processes.map(process => `
+                <tr>
+                    <td>${process.pid}</td>
+                    <td>${process.name}</td>
+                    <td>${process.username || 'N/A'}</td>
+                    <td>${process.memory_mb.toFixed(1)}</td>
+                    <td class="high-usage">+${process.growth_mb_per_hour.toFixed(1)}</td>
+                    <td>${process.r2.toFixed(2)}</td>
+                    <td>${formatDuration(process.growing_seconds)}</td>
+                </tr>`).join('');
+            document.getElementById('process-leaks-info').textContent = result.processes.length
+                ? ''
+                : `No process has grown steadily for the last ${formatDuration(result.window)}.`;
+        }
+        
+        socket.on('process_leaks', inOrder(updateProcessLeaks));
+        compressedHandlers.process_leaks = updateProcessLeaks;
+        
+        document.getElementById('leaks-toggle').addEventListener('click', function() {
+            leaksVisible = !leaksVisible;
+            this.textContent = leaksVisible ? 'Hide' : 'Show';
+            document.getElementById('leaks-body').classList.toggle('d-none', !leaksVisible);
+            socket.emit(leaksVisible ? 'subscribe' : 'unsubscribe', { stream: 'process_leaks' });
+        });
+        
+        // Process action responses
+        socket.on('process_killed', function(data) {
+            if (data.success) {
+                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been terminated.`, 'success');
+                // Request updated process list
+                socket.emit('request_process_list');
+            } else {
+                showToast('Error', `Failed to terminate process: ${data.error}`, 'danger');
+            }
+        });
+        
+        socket.on('process_suspended', function(data) {
+            if (data.success) {
+                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been suspended.`, 'info');
+                // Request updated process list
+                socket.emit('request_process_list');
+            } else {
+                showToast('Error', `Failed to suspend process: ${data.error}`, 'danger');
+            }
+        });
+        
+        socket.on('process_resumed', function(data) {
+            if (data.success) {
+                showToast('Success', `Process ${data.name} (PID: ${data.pid}) has been resumed.`, 'success');
+                // Request updated process list
+                socket.emit('request_process_list');
+            } else {
+                showToast('Error', `Failed to resume process: ${data.error}`, 'danger');
+            }
+        });
+        
+        // Send the current filters, sort and page to the server
+        function sendProcessQuery() {
+            socket.emit('set_process_query', {
+                search: currentFilters.search,
+                status: currentFilters.status,
+                resource: currentFilters.resource,
+                sort: currentSort.field,
+                order: currentSort.order,
+                offset: currentPage.offset,
+                limit: currentPage.limit
+            });
+            updateActiveFiltersDisplay();
+        }
+        
+        // Apply filters from the top of the list again
+        function resetPageAndQuery() {
+            currentPage.offset = 0;
+            sendProcessQuery();
+        }
+        
+        // Render the page of processes sent by the server
+        function updateProcessTable() {
+            // Update table
+            const tableBody = document.getElementById('process-table');
+            tableBody.innerHTML = '';
+            
+            // Add rows
+            allProcesses.forEach(process => {
+                const row = document.createElement('tr');
+                row.classList.add('process-row');
+                row.dataset.pid = process.pid;
                 
                 // Get status indicator class
                 const statusClass = `status-${process.status.toLowerCase()}`;
@@ -840,6 +1666,8 @@ with open('templates/index.html', 'w') as f:
                     <td>${process.memory_mb.toFixed(1)}</td>
                     <td>${process.username || 'N/A'}</td>
                     <td>${process.num_threads}</td>
+                    <td>${formatRate(process.io_read_rate)} / ${formatRate(process.io_write_rate)}</td>
+                    <td>${process.ctx_switch_rate}</td>
                     <td>
                         <div class="d-flex gap-2">
                             <button class="btn btn-sm btn-outline-info view-process" data-pid="${process.pid}" title="View Details">
@@ -893,6 +1721,13 @@ with open('templates/index.html', 'w') as f:
                 }
             });
             
+            // Update page info
+            const first = currentPage.total ? currentPage.offset + 1 : 0;
+            const last = currentPage.offset + allProcesses.length;
+            document.getElementById('process-page-info').textContent = `Showing ${first}-${last} of ${currentPage.total} processes`;
+            document.getElementById('prev-page').disabled = currentPage.offset === 0;
+            document.getElementById('next-page').disabled = last >= currentPage.total;
+            
             // Update active filters display
             updateActiveFiltersDisplay();
         }
@@ -930,7 +1765,7 @@ with open('templates/index.html', 'w') as f:
                 badge.addEventListener('click', function() {
                     document.getElementById('process-search').value = '';
                     currentFilters.search = '';
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
                 container.appendChild(badge);
             }
@@ -942,7 +1777,7 @@ with open('templates/index.html', 'w') as f:
                 badge.innerHTML = `Status: ${currentFilters.status} <i class="bi bi-x"></i>`;
                 badge.addEventListener('click', function() {
                     currentFilters.status = 'all';
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
                 container.appendChild(badge);
             }
@@ -955,7 +1790,7 @@ with open('templates/index.html', 'w') as f:
                 badge.innerHTML = `${label} <i class="bi bi-x"></i>`;
                 badge.addEventListener('click', function() {
                     currentFilters.resource = 'all';
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
                 container.appendChild(badge);
             }
@@ -1014,19 +1849,21 @@ with open('templates/index.html', 'w') as f:
             }
         }
         
-        function updateProgressBarColor(elementId, value) {
-            const element = document.getElementById(elementId);
-            element.classList.remove('bg-danger', 'bg-warning', 'bg-success', 'bg-info');
-            
+        function usageBackground(value) {
             if (value >= 80) {
-                element.classList.add('bg-danger');
+                return 'bg-danger';
             } else if (value >= 50) {
-                element.classList.add('bg-warning');
+                return 'bg-warning';
             } else if (value >= 20) {
-                element.classList.add('bg-success');
-            } else {
-                element.classList.add('bg-info');
+                return 'bg-success';
             }
+            return 'bg-info';
+        }
+        
+        function updateProgressBarColor(elementId, value) {
+            const element = document.getElementById(elementId);
+            element.classList.remove('bg-danger', 'bg-warning', 'bg-success', 'bg-info');
+            element.classList.add(usageBackground(value));
         }
         
         // Event Listeners
@@ -1034,14 +1871,17 @@ with open('templates/index.html', 'w') as f:
             // Process search
             document.getElementById('process-search').addEventListener('input', function() {
                 currentFilters.search = this.value;
-                updateProcessTable();
+                
+                // Wait for the user to stop typing before querying the server
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(resetPageAndQuery, 250);
             });
             
             // Clear search button
             document.getElementById('clear-search').addEventListener('click', function() {
                 document.getElementById('process-search').value = '';
                 currentFilters.search = '';
-                updateProcessTable();
+                resetPageAndQuery();
             });
             
             // Filter dropdown items
@@ -1057,7 +1897,7 @@ with open('templates/index.html', 'w') as f:
                         currentFilters.resource = filterValue;
                     }
                     
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
             });
             
@@ -1067,7 +1907,7 @@ with open('templates/index.html', 'w') as f:
                     e.preventDefault();
                     currentSort.field = this.dataset.sort;
                     currentSort.order = this.dataset.order;
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
             });
             
@@ -1085,10 +1925,21 @@ with open('templates/index.html', 'w') as f:
                         currentSort.order = field === 'name' ? 'asc' : 'desc';
                     }
                     
-                    updateProcessTable();
+                    resetPageAndQuery();
                 });
             });
             
+            // Pagination
+            document.getElementById('prev-page').addEventListener('click', function() {
+                currentPage.offset = Math.max(currentPage.offset - currentPage.limit, 0);
+                sendProcessQuery();
+            });
+            
+            document.getElementById('next-page').addEventListener('click', function() {
+                currentPage.offset += currentPage.limit;
+                sendProcessQuery();
+            });
+            
             // Auto-refresh toggle
             document.getElementById('auto-refresh').addEventListener('change', function() {
                 autoRefresh = this.checked;
@@ -1102,164 +1953,2052 @@ with open('templates/index.html', 'w') as f:
             // Manual refresh button
             document.getElementById('refresh-btn').addEventListener('click', function() {
                 this.querySelector('.refresh-btn-container').classList.add('refreshing');
-                socket.emit('request_process_list');
+                socket.emit('request_process_list', { full: true });
             });
         });
     </script>
 </body>
 </html>
-    ''')
+'''
 
-# Global variables to store previous I/O counters
-prev_disk_io = psutil.disk_io_counters()
-prev_net_io = psutil.net_io_counters()
-prev_time = time.time()
-auto_refresh_enabled = True
-
-def get_system_metrics():
-    """Collect system metrics"""
-    global prev_disk_io, prev_net_io, prev_time
-    
-    current_time = time.time()
-    time_delta = current_time - prev_time
-    
-    # CPU usage
-    cpu_percent = psutil.cpu_percent()
-    
-    # Memory usage
-    memory = psutil.virtual_memory()
-    memory_total = memory.total / (1024 ** 3)  # GB
-    memory_used = memory.used / (1024 ** 3)    # GB
-    memory_percent = memory.percent
-    
-    # Disk I/O
-    current_disk_io = psutil.disk_io_counters()
-    disk_read = (current_disk_io.read_bytes - prev_disk_io.read_bytes) / (1024 ** 2) / time_delta  # MB/s
-    disk_write = (current_disk_io.write_bytes - prev_disk_io.write_bytes) / (1024 ** 2) / time_delta  # MB/s
-    prev_disk_io = current_disk_io
-    
-    # Network I/O
-    current_net_io = psutil.net_io_counters()
-    net_sent = (current_net_io.bytes_sent - prev_net_io.bytes_sent) / (1024 ** 2) / time_delta  # MB/s
-    net_recv = (current_net_io.bytes_recv - prev_net_io.bytes_recv) / (1024 ** 2) / time_delta  # MB/s
-    prev_net_io = current_net_io
-    
-    prev_time = current_time
-    
-    return {
-        'cpu': cpu_percent,
-        'memory_percent': memory_percent,
-        'memory_total': memory_total,
-        'memory_used': memory_used,
-        'disk_read': disk_read,
-        'disk_write': disk_write,
-        'net_sent': net_sent,
-        'net_recv': net_recv
-    }
+# Static assets. The page and everything under static/ are served from memory
+# with ETags; vendored files get long cache lifetimes because their URLs
+# carry the ETag. Third-party libraries load from static/vendor/ when they
+# have been downloaded with --vendor-assets (for hosts without internet
+# access), and from their CDNs otherwise.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+VENDOR_ASSETS = {
+    'bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js',
+    'bootstrap-icons/bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css',
+    'bootstrap-icons/fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/fonts/bootstrap-icons.woff2',
+    'bootstrap-icons/fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/fonts/bootstrap-icons.woff',
+    'chart.js/chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+    'socket.io/socket.io.min.js': 'https://cdn.socket.io/4.6.0/socket.io.min.js'
+}
+ASSET_MAX_AGE = 365 * 24 * 3600   # for URLs that change whenever the content does
+ASSET_MIN_COMPRESS_BYTES = 1024
+ASSET_COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+ASSET_ENCODINGS = ('br', 'gzip')  # in order of preference
 
-def get_process_list():
-    """Get list of running processes with details"""
-    processes = []
+class StaticAsset:
+    """An asset held in memory with its ETag and pre-compressed variants"""
     
-    for proc in psutil.process_iter(['pid', 'name', 'username', 'status', 'cpu_percent', 'memory_percent', 'memory_info', 'num_threads', 'create_time']):
-        try:
-            # Get process info
-            proc_info = proc.info
+    def __init__(self, body, content_type, encodings=None):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.encodings = {}
+        
+        if len(body) < ASSET_MIN_COMPRESS_BYTES or not content_type.startswith(ASSET_COMPRESSIBLE_TYPES):
+            return
+        encodings = dict(encodings or {})
+        if 'gzip' not in encodings:
+            encodings['gzip'] = gzip.compress(body, 9, mtime=0)
+        if 'br' not in encodings and brotli:
+            encodings['br'] = brotli.compress(body, quality=11)
+        # Only keep variants that are worth sending
+        self.encodings = {name: data for name, data in encodings.items() if len(data) < len(body)}
+
+def _asset_content_type(name):
+    """Guess a Content-Type, with a charset for text"""
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+def _load_static_assets():
+    """Read every file under static/, picking up .gz/.br variants built by --vendor-assets"""
+    assets = {}
+    for root, _, files in os.walk(STATIC_DIR):
+        for filename in files:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(root, filename)
+            encodings = {}
+            for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+                if os.path.exists(path + suffix):
+                    with open(path + suffix, 'rb') as f:
+                        encodings[encoding] = f.read()
+            with open(path, 'rb') as f:
+                body = f.read()
             
-            # Convert create time to readable format
-            create_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(proc_info['create_time']))
+            name = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+            assets[name] = StaticAsset(body, _asset_content_type(name), encodings)
+    return assets
+
+# Built on first request, so importing the module stays cheap
+_static_assets = None
+_index_asset = None
+_static_assets_lock = threading.Lock()
+
+def get_static_assets():
+    """Return (static assets by name, the dashboard page)"""
+    global _static_assets, _index_asset
+    
+    with _static_assets_lock:
+        if _static_assets is None:
+            assets = _load_static_assets()
             
-            # Calculate memory in MB
-            memory_mb = proc_info['memory_info'].rss / (1024 * 1024) if proc_info['memory_info'] else 0
+            # Point the page at vendored copies where present, tagged with their ETag
+            page = INDEX_HTML
+            for name, cdn_url in VENDOR_ASSETS.items():
+                asset = assets.get(f'vendor/{name}')
+                url = f'/static/vendor/{name}?v={asset.etag}' if asset else cdn_url
+                page = page.replace(f'vendor:{name}', url)
             
-            processes.append({
-                'pid': proc_info['pid'],
-                'name': proc_info['name'],
-                'status': proc_info['status'],
-                'cpu_percent': proc_info['cpu_percent'],
-                'memory_percent': proc_info['memory_percent'],
-                'memory_mb': memory_mb,
-                'num_threads': proc_info['num_threads'],
-                'create_time': create_time,
-                'username': proc_info['username']
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    
-    # Sort by CPU usage (descending)
-    processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
+            _static_assets = assets
+            _index_asset = StaticAsset(page.encode(), 'text/html; charset=utf-8')
+        return _static_assets, _index_asset
+
+def serve_asset(asset, cache_control):
+    """Respond with an asset, honouring If-None-Match and Accept-Encoding"""
+    if request.if_none_match.contains(asset.etag):
+        response = app.response_class(status=304)
+    else:
+        encoding = next((name for name in ASSET_ENCODINGS
+                         if name in asset.encodings and request.accept_encodings[name]), None)
+        response = app.response_class(asset.encodings[encoding] if encoding else asset.body,
+                                      content_type=asset.content_type)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
     
-    return processes
+    response.set_etag(asset.etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
 
-def get_process_details(pid):
-    """Get detailed information about a specific process"""
-    try:
-        proc = psutil.Process(pid)
-        
-        # Basic info
-        info = proc.as_dict(attrs=[
-            'pid', 'name', 'status', 'username', 'cpu_percent', 
-            'memory_percent', 'memory_info', 'num_threads', 'create_time',
-            'nice', 'ppid', 'cwd', 'exe', 'cmdline', 'terminal'
-        ])
-        
-        # Convert create time to readable format
-        info['create_time'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['create_time']))
+def vendor_assets():
+    """Download VENDOR_ASSETS into static/vendor/ with gzip and brotli variants"""
+    for name, url in VENDOR_ASSETS.items():
+        path = os.path.join(STATIC_DIR, 'vendor', *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
         
-        # Calculate memory in MB
-        info['memory_mb'] = info['memory_info'].rss / (1024 * 1024) if info['memory_info'] else 0
+        logger.info(f"Downloading {url}")
+        with urllib.request.urlopen(url, timeout=30) as response:
+            body = response.read()
+        with open(path, 'wb') as f:
+            f.write(body)
         
-        # Additional info
+        asset = StaticAsset(body, _asset_content_type(name))
+        for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+            if encoding in asset.encodings:
+                with open(path + suffix, 'wb') as f:
+                    f.write(asset.encodings[encoding])
+    
+    if not brotli:
+        logger.warning("brotli is not installed, only gzip variants were built")
+
+# Per-client state, keyed by Socket.IO session id: the periodic streams the
+# client subscribes to, its process query and the last page (seq + rows by PID) it was sent
+client_process_snapshots = {}
+client_snapshots_lock = threading.Lock()
+
+# Periodic streams a client can subscribe to; system metrics, device I/O and
+# alerts go out through a room of the same name
+STREAMS = ('system_metrics', 'io_devices', 'alerts', 'process_list', 'process_tree', 'process_groups',
+           'process_top', 'process_leaks')
+DEFAULT_STREAMS = ('system_metrics', 'alerts', 'process_list')
+# Streams built from the process scan; the sampler only scans while one has subscribers
+PROCESS_STREAMS = ('process_list', 'process_tree', 'process_groups', 'process_top', 'process_leaks')
+
+# Process table queries
+DEFAULT_PROCESS_QUERY = {
+    'search': '',
+    'status': 'all',
+    'resource': 'all',
+    'sort': 'cpu',
+    'order': 'desc',
+    'offset': 0,
+    'limit': 50
+}
+MAX_PAGE_SIZE = 500
+PROCESS_SORT_KEYS = {
+    'pid': lambda proc: proc['pid'],
+    'name': lambda proc: proc['name'].lower(),
+    'status': lambda proc: proc['status'],
+    'cpu': lambda proc: proc['cpu_percent'],
+    'memory': lambda proc: proc['memory_percent'],
+    'memory_mb': lambda proc: proc['memory_mb'],
+    'user': lambda proc: (proc['username'] or '').lower(),
+    'threads': lambda proc: proc['num_threads'],
+    'io': lambda proc: proc['io_read_rate'] + proc['io_write_rate'],
+    'io_read': lambda proc: proc['io_read_rate'],
+    'io_write': lambda proc: proc['io_write_rate'],
+    'ctx_switches': lambda proc: proc['ctx_switch_rate']
+}
+
+# Sampler settings
+METRICS_INTERVAL = 2.0         # seconds between system metric ticks
+PROCESS_INTERVAL = 2.0         # seconds between process list ticks at full rate
+PROCESS_MAX_INTERVAL = 30.0    # slowest process list rate when backing off
+PROCESS_CPU_BUDGET = 0.10      # share of one core the process scan may use
+HEARTBEAT_INTERVAL = 30.0      # metrics tick when no dashboard is connected
+REFRESH_MIN_INTERVAL = 1.0     # manual refreshes reuse snapshots younger than this
+
+# Sampler statistics, exposed through /api/stats. Written by the sampler under
+# sampler_stats_lock so the API can copy a consistent set.
+sampler_stats_lock = threading.Lock()
+sampler_stats = {
+    'subscribers': 0,
+    'process_subscribers': 0,
+    'metrics_interval': METRICS_INTERVAL,
+    'process_interval': PROCESS_INTERVAL,
+    'process_cost': 0.0,
+    'process_cost_avg': 0.0,
+    'missed_ticks': 0
+}
+
+# Newest snapshot produced by the sampler and the clients waiting for a manual refresh
+latest_snapshot = None
+snapshot_condition = threading.Condition()
+pending_refresh = {}           # sid -> full resync requested
+scan_requested = False         # an API request is waiting for a fresh process scan
+refresh_event = threading.Event()
+
+# In-memory history of recent system metrics, backfilled to clients on connect
+METRICS_HISTORY_SIZE = 900     # samples kept (30 minutes at the default interval)
+METRICS_BACKFILL_SECONDS = 300 # history sent to a newly connected client
+METRICS_HISTORY_FIELDS = ('cpu', 'memory_percent', 'disk_read', 'disk_write', 'net_sent', 'net_recv')
+
+# Historical metric storage
+# Next to the script, like static/, so every launch directory shares one history
+HISTORY_DB_PATH = os.environ.get('PROCESS_MONITOR_HISTORY_DB', os.path.join(BASE_DIR, 'process_monitor_history.db'))
+HISTORY_FLUSH_INTERVAL = 10    # seconds between batched writes
+HISTORY_TIERS = (
+    # (resolution in seconds, retention in seconds)
+    (1, 24 * 3600),
+    (60, 30 * 24 * 3600),
+    (3600, 365 * 24 * 3600)
+)
+HISTORY_SYSTEM_METRICS = ('cpu', 'memory_percent', 'memory_used', 'disk_read', 'disk_write', 'net_sent', 'net_recv')
+# Idle samples (no CPU, under this much memory) are not recorded, so per-process
+# averages in the history are over a process's active samples only
+PROCESS_HISTORY_MIN_MEMORY_MB = 50
+
+# Process collector: 'auto' reads /proc directly on Linux, 'psutil' forces the portable path
+PROCESS_COLLECTOR = os.environ.get('PROCESS_MONITOR_COLLECTOR', 'auto')
+PROCESS_SCAN_WORKERS = max(int(os.environ.get('PROCESS_MONITOR_SCAN_WORKERS', '1')), 1)
+PROCESS_SCAN_MIN_SHARD = 512   # fewest PIDs worth giving a worker of its own
+# Per-process disk I/O and context switch rates cost two more reads per process per scan
+PROCESS_IO_RATES = os.environ.get('PROCESS_MONITOR_PROCESS_IO', '1') != '0'
+
+class Snapshot:
+    """Newest system metrics and process list as of one sampler tick.
+    
+    Metrics and processes are collected on separate schedules, so a tick may
+    refresh only one of them; the other is carried over from the previous
+    snapshot and the *_updated flags say which parts are new.
+    """
+    
+    def __init__(self, version, metrics, processes, process_timestamp, metrics_updated, processes_updated):
+        self.version = version
+        self.timestamp = time.time()
+        self.metrics = metrics
+        self.processes = processes
+        self.process_timestamp = process_timestamp
+        self.metrics_updated = metrics_updated
+        self.processes_updated = processes_updated
+        self._processes_by_pid = None
+        self._zombies = None
+    
+    def process(self, pid):
+        """Return this snapshot's row for a PID, or None"""
+        if self._processes_by_pid is None:
+            self._processes_by_pid = {proc['pid']: proc for proc in self.processes}
+        return self._processes_by_pid.get(pid)
+    
+    def zombies(self):
+        """This snapshot's zombie processes, found once however many rules ask"""
+        if self._zombies is None:
+            self._zombies = [proc for proc in self.processes if proc['status'] == 'zombie']
+        return self._zombies
+
+class TickSchedule:
+    """Fixed-rate schedule that keeps its phase instead of drifting by the work time"""
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_tick = time.monotonic()
+    
+    def due(self, now):
+        return now >= self.next_tick
+    
+    def advance(self, now):
+        """Move to the next tick, skipping any ticks that were missed"""
+        self.next_tick += self.interval
+        if self.next_tick <= now:
+            missed = int((now - self.next_tick) // self.interval) + 1
+            self.next_tick += missed * self.interval
+            with sampler_stats_lock:
+                sampler_stats['missed_ticks'] += missed
+    
+    def reschedule(self, interval, now):
+        """Change the interval, taking effect from the next tick"""
+        if interval != self.interval:
+            self.next_tick = min(self.next_tick, now + interval)
+            self.interval = interval
+
+def _cpu_busy_percent(prev_times, cur_times):
+    """Compute CPU utilisation between two psutil.cpu_times() samples"""
+    def busy_and_total(times):
+        total = sum(times)
+        # Guest time is already accounted for in user/nice on Linux
+        total -= getattr(times, 'guest', 0) + getattr(times, 'guest_nice', 0)
+        idle = times.idle + getattr(times, 'iowait', 0)
+        return total - idle, total
+    
+    prev_busy, prev_total = busy_and_total(prev_times)
+    cur_busy, cur_total = busy_and_total(cur_times)
+    
+    total_delta = cur_total - prev_total
+    if total_delta <= 0:
+        return 0.0
+    return round(min(max((cur_busy - prev_busy) / total_delta * 100, 0.0), 100.0), 1)
+
+def _counter_delta(prev, cur, field):
+    """Increase of a cumulative counter between two samples.
+    
+    psutil already undoes 32-bit wraparound (nowrap=True); a counter that still
+    went backwards belongs to a device that was reset or re-added, so count 0.
+    """
+    return max(getattr(cur, field) - getattr(prev, field), 0)
+
+def _counter_rate(prev, cur, field, time_delta):
+    """Per-second rate of a cumulative counter in MB/s, 0 if the counters are unavailable"""
+    if prev is None or cur is None:
+        return 0.0
+    return _counter_delta(prev, cur, field) / (1024 ** 2) / time_delta
+
+# Extra system metrics, sent as packed float32 arrays instead of one key per value
+CPU_BREAKDOWN_FIELDS = ('user', 'nice', 'system', 'irq', 'softirq', 'iowait', 'steal', 'idle')
+PRESSURE_FIELDS = ('cpu_some', 'memory_some', 'memory_full', 'io_some', 'io_full')
+METRICS_ARRAY_FIELDS = ('per_cpu', 'cpu_breakdown', 'load_avg', 'pressure')
+
+def _cpu_breakdown(prev_times, cur_times):
+    """Share of CPU time in each of CPU_BREAKDOWN_FIELDS between two psutil.cpu_times() samples"""
+    deltas = [getattr(cur_times, field, 0) - getattr(prev_times, field, 0) for field in CPU_BREAKDOWN_FIELDS]
+    # Every field that counts towards the total, including ones not broken out
+    total = sum(cur_times) - sum(prev_times)
+    total -= (getattr(cur_times, 'guest', 0) + getattr(cur_times, 'guest_nice', 0)
+              - getattr(prev_times, 'guest', 0) - getattr(prev_times, 'guest_nice', 0))
+    if total <= 0:
+        return [0.0] * len(CPU_BREAKDOWN_FIELDS)
+    return [round(max(delta, 0) / total * 100, 1) for delta in deltas]
+
+def read_pressure():
+    """avg10 stall percentages from /proc/pressure in PRESSURE_FIELDS order, NaN where PSI is unavailable"""
+    averages = {}
+    for resource in ('cpu', 'memory', 'io'):
         try:
-            info['cpu_times'] = f"User: {proc.cpu_times().user:.2f}s, System: {proc.cpu_times().system:.2f}s"
-        except:
-            info['cpu_times'] = "N/A"
+            with open(f'/proc/pressure/{resource}') as f:
+                for line in f:
+                    kind, avg10 = line.split()[:2]
+                    averages[f'{resource}_{kind}'] = float(avg10.partition('=')[2])
+        except (OSError, ValueError):
+            continue
+    return [averages.get(field, math.nan) for field in PRESSURE_FIELDS]
+
+class MetricsSampler:
+    """Collects system metrics, owning the counter baselines its rates are computed from.
+    
+    Only the sampler thread calls sample(), which moves the baselines once per
+    tick. Every other reader calls latest() and gets the cached metrics.
+    """
+    
+    # Ticks closer together than this reuse the previous rates
+    MIN_TIME_DELTA = 0.1
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prev_cpu_times = psutil.cpu_times()
+        self._prev_per_cpu_times = psutil.cpu_times(percpu=True)
+        self._prev_disk_io = psutil.disk_io_counters()
+        self._prev_net_io = psutil.net_io_counters()
+        self._prev_time = time.monotonic()
+        self._metrics = None
+    
+    def sample(self):
+        """Advance the baselines and compute a fresh set of metrics"""
+        with self._lock:
+            current_time = time.monotonic()
+            time_delta = current_time - self._prev_time
             
-        try:
-            io_counters = proc.io_counters()
-            info['io_read'] = f"{io_counters.read_bytes / (1024 * 1024):.2f} MB"
-            info['io_write'] = f"{io_counters.write_bytes / (1024 * 1024):.2f} MB"
-        except:
-            info['io_read'] = "N/A"
-            info['io_write'] = "N/A"
+            # Avoid rate spikes from near-zero intervals
+            if self._metrics is not None and time_delta < self.MIN_TIME_DELTA:
+                return self._metrics
+            time_delta = max(time_delta, self.MIN_TIME_DELTA)
             
-        try:
-            connections = proc.connections()
-            info['connections'] = str(len(connections))
-        except:
-            info['connections'] = "N/A"
+            # CPU usage
+            current_cpu_times = psutil.cpu_times()
+            cpu_percent = _cpu_busy_percent(self._prev_cpu_times, current_cpu_times)
+            cpu_breakdown = _cpu_breakdown(self._prev_cpu_times, current_cpu_times)
+            
+            # Per-core usage, so one pegged core isn't averaged away on big hosts
+            current_per_cpu_times = psutil.cpu_times(percpu=True)
+            per_cpu = [_cpu_busy_percent(prev, cur) for prev, cur in zip(self._prev_per_cpu_times, current_per_cpu_times)]
+            
+            # Memory usage
+            memory = psutil.virtual_memory()
+            memory_total = memory.total / (1024 ** 3)  # GB
+            memory_used = memory.used / (1024 ** 3)    # GB
+            memory_percent = memory.percent
+            
+            # Disk I/O
+            current_disk_io = psutil.disk_io_counters()
+            disk_read = _counter_rate(self._prev_disk_io, current_disk_io, 'read_bytes', time_delta)  # MB/s
+            disk_write = _counter_rate(self._prev_disk_io, current_disk_io, 'write_bytes', time_delta)  # MB/s
             
+            # Network I/O
+            current_net_io = psutil.net_io_counters()
+            net_sent = _counter_rate(self._prev_net_io, current_net_io, 'bytes_sent', time_delta)  # MB/s
+            net_recv = _counter_rate(self._prev_net_io, current_net_io, 'bytes_recv', time_delta)  # MB/s
+            
+            self._prev_cpu_times = current_cpu_times
+            self._prev_per_cpu_times = current_per_cpu_times
+            self._prev_disk_io = current_disk_io
+            self._prev_net_io = current_net_io
+            self._prev_time = current_time
+            
+            self._metrics = {
+                'timestamp': time.time(),
+                'cpu': cpu_percent,
+                'memory_percent': memory_percent,
+                'memory_total': memory_total,
+                'memory_used': memory_used,
+                'disk_read': disk_read,
+                'disk_write': disk_write,
+                'net_sent': net_sent,
+                'net_recv': net_recv,
+                'per_cpu': per_cpu,
+                'cpu_breakdown': cpu_breakdown,
+                'load_avg': list(psutil.getloadavg()),
+                'pressure': read_pressure()
+            }
+            return self._metrics
+    
+    def latest(self):
+        """Return the most recently computed metrics without moving the baselines"""
+        with self._lock:
+            metrics = self._metrics
+        return metrics if metrics is not None else self.sample()
+
+metrics_sampler = MetricsSampler()
+
+def get_system_metrics():
+    """Collect system metrics"""
+    return metrics_sampler.latest()
+
+class DeviceIOSampler:
+    """Per-disk and per-interface I/O rates, so one busy device isn't hidden in the totals.
+    
+    Devices are matched by name between samples. One that appears is reported
+    with zero rates until it has a baseline, one that disappears is dropped.
+    """
+    
+    MIN_TIME_DELTA = MetricsSampler.MIN_TIME_DELTA
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prev_disks = self._disk_counters()
+        self._prev_nics = self._nic_counters()
+        self._prev_time = time.monotonic()
+        self._devices = None
+    
+    @staticmethod
+    def _disk_counters():
         try:
-            open_files = proc.open_files()
-            if open_files:
-                info['open_files'] = "\n".join([f.path for f in open_files[:10]])
-                if len(open_files) > 10:
-                    info['open_files'] += f"\n... and {len(open_files) - 10} more"
-            else:
-                info['open_files'] = "None"
-        except:
-            info['open_files'] = "N/A"
+            return psutil.disk_io_counters(perdisk=True) or {}
+        except (OSError, RuntimeError):
+            return {}
+    
+    @staticmethod
+    def _nic_counters():
+        try:
+            return psutil.net_io_counters(pernic=True) or {}
+        except OSError:
+            return {}
+    
+    def _disk_row(self, name, prev, cur, time_delta):
+        reads = _counter_delta(prev, cur, 'read_count')
+        writes = _counter_delta(prev, cur, 'write_count')
+        row = {
+            'name': name,
+            'read_mb': _counter_delta(prev, cur, 'read_bytes') / (1024 ** 2) / time_delta,
+            'write_mb': _counter_delta(prev, cur, 'write_bytes') / (1024 ** 2) / time_delta,
+            'read_iops': reads / time_delta,
+            'write_iops': writes / time_delta,
+            # Average time per completed request, queueing included
+            'read_await_ms': _counter_delta(prev, cur, 'read_time') / reads if reads else 0.0,
+            'write_await_ms': _counter_delta(prev, cur, 'write_time') / writes if writes else 0.0,
+            'busy_percent': None
+        }
+        if hasattr(cur, 'busy_time'):
+            row['busy_percent'] = min(_counter_delta(prev, cur, 'busy_time') / 10 / time_delta, 100.0)
+        return row
+    
+    def _nic_row(self, name, prev, cur, time_delta):
+        return {
+            'name': name,
+            'sent_mb': _counter_delta(prev, cur, 'bytes_sent') / (1024 ** 2) / time_delta,
+            'recv_mb': _counter_delta(prev, cur, 'bytes_recv') / (1024 ** 2) / time_delta,
+            'packets_sent': _counter_delta(prev, cur, 'packets_sent') / time_delta,
+            'packets_recv': _counter_delta(prev, cur, 'packets_recv') / time_delta,
+            'errors_in': _counter_delta(prev, cur, 'errin') / time_delta,
+            'errors_out': _counter_delta(prev, cur, 'errout') / time_delta,
+            'drops_in': _counter_delta(prev, cur, 'dropin') / time_delta,
+            'drops_out': _counter_delta(prev, cur, 'dropout') / time_delta
+        }
+    
+    def sample(self):
+        """Advance the baselines and compute fresh per-device rates"""
+        with self._lock:
+            current_time = time.monotonic()
+            time_delta = current_time - self._prev_time
+            if self._devices is not None and time_delta < self.MIN_TIME_DELTA:
+                return self._devices
+            time_delta = max(time_delta, self.MIN_TIME_DELTA)
             
-        # Convert cmdline list to string
-        if info['cmdline']:
-            info['cmdline'] = " ".join(info['cmdline'])
-        else:
-            info['cmdline'] = "N/A"
+            disks = self._disk_counters()
+            nics = self._nic_counters()
             
-        return info
-        
-    except psutil.NoSuchProcess:
-        return {"error": "Process no longer exists"}
-    except psutil.AccessDenied:
-        return {"error": "Access denied to process information"}
-    except Exception as e:
-        return {"error": f"Error retrieving process details: {str(e)}"}
+            self._devices = {
+                'timestamp': time.time(),
+                # Devices that never did any I/O (unused loop and ram disks) are left out
+                'disks': [self._disk_row(name, self._prev_disks.get(name, cur), cur, time_delta)
+                          for name, cur in sorted(disks.items())
+                          if cur.read_count or cur.write_count],
+                'nics': [self._nic_row(name, self._prev_nics.get(name, cur), cur, time_delta)
+                         for name, cur in sorted(nics.items())]
+            }
+            self._prev_disks = disks
+            self._prev_nics = nics
+            self._prev_time = current_time
+            return self._devices
+    
+    def latest(self):
+        """Return the most recently computed device rates without moving the baselines"""
+        with self._lock:
+            devices = self._devices
+        return devices if devices is not None else self.sample()
 
-def kill_process(pid, force=False):
-    """Kill a process by PID"""
+device_io_sampler = DeviceIOSampler()
+
+# Linux process states, named as psutil reports them
+PROC_STATUSES = {
+    'R': 'running',
+    'S': 'sleeping',
+    'D': 'disk-sleep',
+    'T': 'stopped',
+    't': 'tracing-stop',
+    'Z': 'zombie',
+    'X': 'dead',
+    'x': 'dead',
+    'K': 'wake-kill',
+    'W': 'waking',
+    'I': 'idle',
+    'P': 'parked'
+}
+
+class StaticAttrCache:
+    """Per-process attributes that never change for the life of a process.
+    
+    Entries are keyed on (pid, create_time), so a reused PID misses the cache,
+    and are evicted at the end of each scan once their PID has gone. Shards
+    touch disjoint PIDs, so no lock is needed.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+    
+    def get(self, pid, create_time):
+        entry = self._entries.get(pid)
+        if entry and entry[0] == create_time:
+            return entry[1]
+        return None
+    
+    def put(self, pid, create_time, attrs):
+        self._entries[pid] = (create_time, attrs)
+    
+    def evict(self, seen_pids):
+        for pid in self._entries.keys() - seen_pids:
+            del self._entries[pid]
+
+def format_create_time(create_time):
+    """Convert create time to readable format"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(create_time))
+
+def parse_cgroup(text):
+    """Pick a process's cgroup from /proc/<pid>/cgroup: the v2 path, else the v1 systemd or cpu one"""
+    paths = {}
+    for line in text.splitlines():
+        _, controllers, path = line.split(':', 2)
+        for controller in controllers.split(','):
+            paths[controller] = path
+    return paths.get('') or paths.get('name=systemd') or paths.get('cpu') or next(iter(paths.values()), None)
+
+def read_cgroup(pid):
+    """Return a process's cgroup path, or None where cgroups are not available"""
     try:
+        with open(f'/proc/{pid}/cgroup') as f:
+            return parse_cgroup(f.read())
+    except (OSError, ValueError):
+        return None
+
+def process_counter_rate(previous, current, elapsed):
+    """Whole units per second of a per-process counter, 0 if either reading is missing"""
+    if previous is None or current is None:
+        return 0
+    return round(max(current - previous, 0) / elapsed)
+
+class ProcessHandles:
+    """psutil.Process objects shared by the sampler and on-demand requests.
+    
+    Reusing one object per PID keeps psutil's per-object caches (create time,
+    CPU% baseline) and saves re-reading /proc/<pid>/stat just to build a
+    handle. Handles for PIDs missing from the latest scan are dropped, so a
+    cached handle is never older than one scan; signals are still safe as
+    psutil checks for PID reuse before sending them.
+    """
+    
+    def __init__(self):
+        self._procs = {}
+        self._lock = threading.Lock()
+    
+    def get(self, pid, verify=False):
+        """Return the handle for a PID, replacing it first if verify finds the PID reused"""
+        with self._lock:
+            proc = self._procs.get(pid)
+        if proc is not None and not (verify and not proc.is_running()):
+            return proc
+        
         proc = psutil.Process(pid)
-        proc_name = proc.name()
+        with self._lock:
+            self._procs[pid] = proc
+        return proc
+    
+    def retain(self, pids):
+        """Drop handles for PIDs that are not in pids"""
+        with self._lock:
+            for pid in self._procs.keys() - pids:
+                del self._procs[pid]
+
+process_handles = ProcessHandles()
+
+class ProcFSCollector:
+    """Linux process collector that reads /proc/<pid>/stat and statm directly.
+    
+    Files are opened relative to a preopened /proc directory fd and read into
+    a buffer reused for the whole shard. CPU% is computed from jiffies deltas
+    between scans and usernames are cached per uid. Produces the same rows as
+    the psutil collector.
+    """
+    
+    def __init__(self):
+        self._proc_fd = os.open('/proc', os.O_RDONLY | os.O_DIRECTORY)
+        self._clock_ticks = os.sysconf('SC_CLK_TCK')
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._boot_time = psutil.boot_time()
+        self._memory_total = psutil.virtual_memory().total
+        self._usernames = {}
+        # Username, formatted create time and full name, keyed on (pid, starttime)
+        self._static = StaticAttrCache()
+        # pid -> (starttime, cpu jiffies, read bytes, write bytes, context switches, monotonic time)
+        self._last_seen = {}
+    
+    def _read(self, path, buffer):
+        """Read a small /proc file relative to the /proc fd into a reused buffer"""
+        fd = os.open(path, os.O_RDONLY, dir_fd=self._proc_fd)
+        try:
+            n = os.readv(fd, [buffer])
+        finally:
+            os.close(fd)
+        return buffer[:n]
+    
+    def _username(self, uid):
+        name = self._usernames.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._usernames[uid] = name
+        return name
+    
+    def _full_name(self, pid, comm, buffer):
+        """The kernel truncates comm to 15 bytes; recover the full name from cmdline like psutil"""
+        try:
+            cmdline = self._read(f'{pid}/cmdline', buffer).split(b'\0')
+        except OSError:
+            return comm
+        exe = os.path.basename(cmdline[0].decode(errors='replace')) if cmdline else ''
+        return exe if exe.startswith(comm) else comm
+    
+    def _io_counters(self, pid, buffer):
+        """(read_bytes, write_bytes, context switches), with None for anything not readable"""
+        try:
+            # Only other users' processes need ptrace access, so this fails without root
+            tokens = bytes(self._read(f'{pid}/io', buffer)).split()
+            counters = dict(zip(tokens[::2], tokens[1::2]))
+            read_bytes, write_bytes = int(counters[b'read_bytes:']), int(counters[b'write_bytes:'])
+        except (OSError, KeyError, ValueError):
+            read_bytes = write_bytes = None
+        try:
+            # Same counts psutil's num_ctx_switches() reports; the schedstat timeslice
+            # count also includes runs that were not switches
+            status = bytes(self._read(f'{pid}/status', buffer))
+            ctx_switches = sum(
+                int(status[status.index(key) + len(key):].split(None, 1)[0])
+                for key in (b'\nvoluntary_ctxt_switches:', b'\nnonvoluntary_ctxt_switches:'))
+        except (OSError, IndexError, ValueError):
+            ctx_switches = None
+        return read_bytes, write_bytes, ctx_switches
+    
+    def _cgroup(self, pid, buffer):
+        try:
+            return parse_cgroup(self._read(f'{pid}/cgroup', buffer).decode(errors='replace'))
+        except (OSError, ValueError):
+            return None
+    
+    def list_pids(self):
+        return [int(entry) for entry in os.listdir(self._proc_fd) if entry.isdigit()]
+    
+    def collect_pids(self, pids, now):
+        """Return rows for the given PIDs, computing CPU% against the scan time `now`"""
+        processes = []
+        buffer = bytearray(4096)
+        
+        for pid in pids:
+            entry = str(pid)
+            try:
+                stat = self._read(f'{entry}/stat', buffer)
+                # comm may itself contain spaces and parentheses
+                rparen = stat.rindex(b')')
+                comm = stat[stat.index(b'(') + 1:rparen].decode(errors='replace')
+                fields = stat[rparen + 2:].split()
+                
+                resident = int(self._read(f'{entry}/statm', buffer).split()[1])
+                
+                # Owner, create time and full name only need reading once per process
+                starttime = int(fields[19])
+                static = self._static.get(pid, starttime)
+                if static is None:
+                    uid = os.stat(entry, dir_fd=self._proc_fd).st_uid
+                    static = {
+                        'username': self._username(uid),
+                        'create_time': format_create_time(self._boot_time + starttime / self._clock_ticks),
+                        'full_name': self._full_name(entry, comm, buffer) if len(comm) == 15 else None,
+                        # Processes rarely move between cgroups, so this is read once too
+                        'cgroup': self._cgroup(entry, buffer)
+                    }
+                    self._static.put(pid, starttime, static)
+            except (OSError, ValueError, IndexError):
+                # Process exited mid-scan or is not readable
+                continue
+            
+            jiffies = int(fields[11]) + int(fields[12])
+            counters = self._io_counters(entry, buffer) if PROCESS_IO_RATES else (None, None, None)
+            
+            # Rates since the previous scan; PID reuse shows up as a new starttime
+            previous = self._last_seen.get(pid)
+            if previous and previous[0] == starttime and now > previous[5]:
+                elapsed = now - previous[5]
+                cpu_percent = (jiffies - previous[1]) / self._clock_ticks / elapsed * 100
+                rates = [process_counter_rate(old, new, elapsed) for old, new in zip(previous[2:5], counters)]
+            else:
+                cpu_percent = 0.0
+                rates = [0, 0, 0]
+            self._last_seen[pid] = (starttime, jiffies, *counters, now)
+            
+            # comm changes on exec, so only trust the full name while it still matches
+            full_name = static['full_name']
+            name = full_name if full_name and full_name.startswith(comm) else comm
+            rss = resident * self._page_size
+            
+            processes.append({
+                'pid': pid,
+                'name': name,
+                'status': PROC_STATUSES.get(fields[0].decode(), '?'),
+                'cpu_percent': round(cpu_percent, 1),
+                'memory_percent': rss / self._memory_total * 100,
+                'memory_mb': rss / (1024 * 1024),
+                'num_threads': int(fields[17]),
+                'ppid': int(fields[1]),
+                'io_read_rate': rates[0],
+                'io_write_rate': rates[1],
+                'ctx_switch_rate': rates[2],
+                'create_time': static['create_time'],
+                'username': static['username'],
+                'cgroup': static['cgroup']
+            })
+        
+        return processes
+    
+    def end_scan(self, seen_pids):
+        """Forget PIDs that have exited so the caches stay bounded"""
+        for pid in self._last_seen.keys() - seen_pids:
+            del self._last_seen[pid]
+        self._static.evict(seen_pids)
+        process_handles.retain(seen_pids)
+    
+    def collect(self):
+        """Return one row per process in a single pass"""
+        processes = self.collect_pids(self.list_pids(), time.monotonic())
+        self.end_scan({proc['pid'] for proc in processes})
+        return processes
+
+class PsutilCollector:
+    """Portable process collector built on psutil.
+    
+    Keeps one psutil.Process per PID between scans in process_handles, like
+    process_iter does, so that cpu_percent() has a baseline to compare
+    against. Only the volatile attributes are read every scan; username and
+    create time are read once per process.
+    """
+    
+    ATTRS = ['name', 'status', 'cpu_percent', 'memory_percent', 'memory_info', 'num_threads', 'ppid']
+    IO_ATTRS = ['io_counters', 'num_ctx_switches']
+    
+    def __init__(self):
+        self._static = StaticAttrCache()
+        # pid -> (create time, read bytes, write bytes, context switches, monotonic time)
+        self._last_counters = {}
+    
+    def list_pids(self):
+        return psutil.pids()
+    
+    def collect_pids(self, pids, now):
+        """Return rows for the given PIDs"""
+        processes = []
+        
+        for pid in pids:
+            try:
+                # Replace cached objects whose PID has been reused
+                proc = process_handles.get(pid, verify=True)
+                
+                # Process.create_time() is cached on the object after the first call
+                static = self._static.get(pid, proc.create_time())
+                if static is None:
+                    static = proc.as_dict(['username', 'create_time'])
+                    static['create_time'] = format_create_time(static['create_time'])
+                    static['cgroup'] = read_cgroup(pid)
+                    self._static.put(pid, proc.create_time(), static)
+                
+                # Get process info
+                proc_info = proc.as_dict(self.ATTRS + self.IO_ATTRS if PROCESS_IO_RATES else self.ATTRS)
+                
+                # Calculate memory in MB
+                memory_mb = proc_info['memory_info'].rss / (1024 * 1024) if proc_info['memory_info'] else 0
+                
+                # I/O and context switch rates since the previous scan
+                io = proc_info.get('io_counters')
+                ctx = proc_info.get('num_ctx_switches')
+                counters = (io.read_bytes if io else None, io.write_bytes if io else None,
+                            ctx.voluntary + ctx.involuntary if ctx else None)
+                previous = self._last_counters.get(pid)
+                if previous and previous[0] == proc.create_time() and now > previous[4]:
+                    rates = [process_counter_rate(old, new, now - previous[4])
+                             for old, new in zip(previous[1:4], counters)]
+                else:
+                    rates = [0, 0, 0]
+                self._last_counters[pid] = (proc.create_time(), *counters, now)
+                
+                processes.append({
+                    'pid': pid,
+                    'name': proc_info['name'],
+                    'status': proc_info['status'],
+                    'cpu_percent': proc_info['cpu_percent'],
+                    'memory_percent': proc_info['memory_percent'],
+                    'memory_mb': memory_mb,
+                    'num_threads': proc_info['num_threads'],
+                    'ppid': proc_info['ppid'],
+                    'io_read_rate': rates[0],
+                    'io_write_rate': rates[1],
+                    'ctx_switch_rate': rates[2],
+                    'create_time': static['create_time'],
+                    'username': static['username'],
+                    'cgroup': static['cgroup']
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        
+        return processes
+    
+    def end_scan(self, seen_pids):
+        """Forget PIDs that have exited"""
+        process_handles.retain(seen_pids)
+        self._static.evict(seen_pids)
+        for pid in self._last_counters.keys() - seen_pids:
+            del self._last_counters[pid]
+    
+    def collect(self):
+        """Return one row per process in a single pass"""
+        processes = self.collect_pids(self.list_pids(), time.monotonic())
+        self.end_scan({proc['pid'] for proc in processes})
+        return processes
+
+def _create_process_collector():
+    """Pick the /proc fast path on Linux unless the psutil collector was requested"""
+    if PROCESS_COLLECTOR != 'psutil' and sys.platform.startswith('linux'):
+        try:
+            return ProcFSCollector()
+        except OSError as e:
+            logger.warning(f"/proc collector unavailable, falling back to psutil: {e}")
+    return PsutilCollector()
+
+process_collector = _create_process_collector()
+scan_executor = ThreadPoolExecutor(max_workers=PROCESS_SCAN_WORKERS, thread_name_prefix='scan') if PROCESS_SCAN_WORKERS > 1 else None
+
+def _collect_shard(pids, now):
+    """Collect one shard, timing it"""
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    processes = process_collector.collect_pids(pids, now)
+    return processes, {
+        'pids': len(pids),
+        'seconds': time.perf_counter() - started,
+        'cpu_seconds': time.thread_time() - cpu_started
+    }
+
+def scan_processes():
+    """Collect every process, split into shards across the scan workers.
+    
+    All shards compute CPU% against the same scan timestamp so the merged
+    list is one consistent snapshot. Timing per shard is kept in
+    sampler_stats['scan'].
+    """
+    started = time.perf_counter()
+    now = time.monotonic()
+    pids = process_collector.list_pids()
+    
+    # Don't bother splitting small hosts into tiny shards
+    workers = min(PROCESS_SCAN_WORKERS, max(len(pids) // PROCESS_SCAN_MIN_SHARD, 1))
+    if workers > 1:
+        # Interleaved shards spread old, long-lived PIDs evenly across workers
+        results = list(scan_executor.map(_collect_shard, [pids[i::workers] for i in range(workers)], [now] * workers))
+    else:
+        results = [_collect_shard(pids, now)]
+    
+    processes = []
+    for shard_processes, _ in results:
+        processes.extend(shard_processes)
+    process_collector.end_scan({proc['pid'] for proc in processes})
+    
+    shards = [shard_stats for _, shard_stats in results]
+    scan = {
+        'collector': type(process_collector).__name__,
+        'workers': workers,
+        'processes': len(processes),
+        'seconds': time.perf_counter() - started,
+        'cpu_seconds': sum(shard['cpu_seconds'] for shard in shards),
+        'shards': shards
+    }
+    with sampler_stats_lock:
+        sampler_stats['scan'] = scan
+    return processes
+
+def get_process_list():
+    """Get list of running processes with details, in no particular order.
+    
+    Each consumer orders only what it sends: a page of the table or a top-K
+    set, both with bounded heap selection instead of a full sort per tick.
+    """
+    return scan_processes()
+
+# Process tree settings
+TREE_DEFAULT_DEPTH = 1         # levels below the top-level processes sent without expanding
+TREE_MAX_CHILDREN = 200        # children listed per node, busiest subtrees first
+
+class ProcessTree:
+    """Parent/child index over the process list, updated incrementally each scan.
+    
+    Only processes that appeared, exited or were reparented since the last
+    scan touch the index. Subtree rollups (process count, CPU%, RSS) are
+    computed once per scan in a single post-order pass, the first time a
+    tree is requested.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parents = {}     # pid -> ppid
+        self._children = {}    # pid -> set of child pids
+        self._rows = {}        # pid -> row from the latest scan
+        self._rollups = None   # pid -> [processes, cpu_percent, memory_mb] in the subtree
+    
+    def update(self, processes):
+        """Apply the processes from a new scan to the index"""
+        with self._lock:
+            rows = {proc['pid']: proc for proc in processes}
+            
+            for pid in self._parents.keys() - rows.keys():
+                self._unlink(pid)
+            for pid, proc in rows.items():
+                ppid = proc.get('ppid') or 0
+                if self._parents.get(pid, -1) != ppid:
+                    self._unlink(pid)
+                    self._parents[pid] = ppid
+                    self._children.setdefault(ppid, set()).add(pid)
+            
+            self._rows = rows
+            self._rollups = None
+    
+    def _unlink(self, pid):
+        ppid = self._parents.pop(pid, None)
+        siblings = self._children.get(ppid)
+        if siblings is not None:
+            siblings.discard(pid)
+            if not siblings:
+                del self._children[ppid]
+    
+    def _roots(self):
+        """Processes whose parent is not visible (PID 0, another namespace or already gone)"""
+        return [pid for pid, ppid in self._parents.items() if ppid not in self._parents or ppid == pid]
+    
+    def _compute_rollups(self):
+        if self._rollups is not None:
+            return self._rollups
+        
+        # Iterative DFS, so deep chains can't hit the recursion limit
+        order = []
+        visited = set()
+        stack = self._roots()
+        while stack:
+            pid = stack.pop()
+            if pid in visited:
+                continue
+            visited.add(pid)
+            order.append(pid)
+            stack.extend(self._children.get(pid, ()))
+        
+        rollups = {}
+        for pid in reversed(order):
+            row = self._rows[pid]
+            totals = rollups.setdefault(pid, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += row['cpu_percent']
+            totals[2] += row['memory_mb']
+            
+            ppid = self._parents[pid]
+            if ppid in self._rows and ppid != pid:
+                parent = rollups.setdefault(ppid, [0, 0.0, 0.0])
+                parent[0] += totals[0]
+                parent[1] += totals[1]
+                parent[2] += totals[2]
+        
+        self._rollups = rollups
+        return rollups
+    
+    def _node(self, pid, depth, expanded, rollups):
+        row = self._rows[pid]
+        count, cpu, memory = rollups[pid]
+        children = self._children.get(pid, ())
+        node = {
+            'pid': pid,
+            'name': row['name'],
+            'username': row['username'],
+            'cpu_percent': row['cpu_percent'],
+            'memory_mb': row['memory_mb'],
+            'subtree_processes': count,
+            'subtree_cpu_percent': round(cpu, 1),
+            'subtree_memory_mb': round(memory, 1),
+            'child_count': len(children),
+            'children': None
+        }
+        if children and expanded.get(pid, depth > 0):
+            node['children'] = self._nodes(children, depth - 1, expanded, rollups)
+        return node
+    
+    def _nodes(self, pids, depth, expanded, rollups):
+        pids = sorted((pid for pid in pids if pid in rollups), key=lambda pid: (rollups[pid][1], rollups[pid][2]), reverse=True)
+        return [self._node(pid, depth, expanded, rollups) for pid in pids[:TREE_MAX_CHILDREN]]
+    
+    def subtree(self, root=None, depth=TREE_DEFAULT_DEPTH, expanded=None):
+        """Return the tree below `root` (or the whole forest).
+        
+        Nodes are open down to `depth` levels; `expanded` maps PIDs to True or
+        False to open or collapse them regardless. Closed nodes carry only
+        their rollups and child_count, with children set to None.
+        """
+        expanded = expanded or {}
+        with self._lock:
+            rollups = self._compute_rollups()
+            if root is None:
+                nodes = self._nodes(self._roots(), depth, expanded, rollups)
+            elif root in rollups:
+                nodes = [self._node(root, depth, expanded, rollups)]
+            else:
+                nodes = []
+            return {'root': root, 'processes': len(self._rows), 'nodes': nodes}
+
+process_tree = ProcessTree()
+
+# Group-by aggregation over the process list
+GROUP_BY_KEYS = {
+    'username': lambda row: row['username'],
+    'name': lambda row: row['name'],
+    'cgroup': lambda row: row.get('cgroup'),
+    'parent': lambda row: row.get('ppid')
+}
+GROUP_FIELDS = ('cpu_percent', 'memory_mb', 'num_threads')
+GROUP_SORT_KEYS = ('count',) + tuple(f'{field}_{stat}' for field in GROUP_FIELDS for stat in ('sum', 'max'))
+DEFAULT_GROUP_QUERY = {'by': 'username', 'sort': 'cpu_percent_sum', 'limit': 50}
+MAX_GROUPS = 500
+
+class ProcessGroups:
+    """Running count/sum/max of GROUP_FIELDS per group, for every GROUP_BY_KEYS grouping.
+    
+    Each scan only touches processes that appeared, exited, or changed a
+    grouped value or key: their old contribution is taken out and the new
+    one added. A group's max is recomputed from its members only when a
+    member at the max went down or left.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}        # pid -> (group keys, field values) as last counted
+        self._names = {}       # pid -> name, to label 'parent' groups
+        self._groups = {by: {} for by in GROUP_BY_KEYS}
+    
+    def update(self, processes):
+        """Apply the processes from a new scan"""
+        with self._lock:
+            seen = set()
+            for proc in processes:
+                pid = proc['pid']
+                seen.add(pid)
+                entry = (tuple(key(proc) for key in GROUP_BY_KEYS.values()),
+                         tuple(proc[field] for field in GROUP_FIELDS))
+                old = self._rows.get(pid)
+                if old != entry:
+                    if old:
+                        self._remove(pid, *old)
+                    self._add(pid, *entry)
+                    self._rows[pid] = entry
+                self._names[pid] = proc['name']
+            
+            for pid in self._rows.keys() - seen:
+                self._remove(pid, *self._rows.pop(pid))
+                del self._names[pid]
+    
+    def _add(self, pid, keys, values):
+        for groups, key in zip(self._groups.values(), keys):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {'members': set(), 'sum': [0] * len(GROUP_FIELDS),
+                                       'max': [0] * len(GROUP_FIELDS), 'dirty': False}
+            group['members'].add(pid)
+            for i, value in enumerate(values):
+                group['sum'][i] += value
+                if value > group['max'][i]:
+                    group['max'][i] = value
+    
+    def _remove(self, pid, keys, values):
+        for groups, key in zip(self._groups.values(), keys):
+            group = groups[key]
+            group['members'].discard(pid)
+            if not group['members']:
+                del groups[key]
+                continue
+            for i, value in enumerate(values):
+                group['sum'][i] -= value
+                if value >= group['max'][i]:
+                    group['dirty'] = True
+    
+    def _refresh_max(self, group):
+        members = [self._rows[pid][1] for pid in group['members']]
+        group['max'] = [max(values[i] for values in members) for i in range(len(GROUP_FIELDS))]
+        group['dirty'] = False
+    
+    def _label(self, by, key):
+        if by == 'parent':
+            return f"{self._names.get(key, 'N/A')} ({key})"
+        return key if key is not None else 'N/A'
+    
+    def query(self, by='username', sort='cpu_percent_sum', limit=50):
+        """Return the top `limit` groups for one grouping, ordered by `sort` (descending)"""
+        with self._lock:
+            groups = self._groups[by]
+            rows = []
+            for key, group in groups.items():
+                if group['dirty']:
+                    self._refresh_max(group)
+                row = {'key': key, 'label': self._label(by, key), 'count': len(group['members'])}
+                for i, field in enumerate(GROUP_FIELDS):
+                    # Running sums collect float error, so round what we hand out
+                    row[f'{field}_sum'] = round(group['sum'][i], 1)
+                    row[f'{field}_max'] = round(group['max'][i], 1)
+                rows.append(row)
+        
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return {'by': by, 'sort': sort, 'total': len(rows), 'groups': rows[:limit]}
+
+process_groups = ProcessGroups()
+
+def parse_group_query(data, query=None):
+    """Validate a client's group-by query, keeping current values for anything missing or bad"""
+    query = dict(query or DEFAULT_GROUP_QUERY)
+    if not isinstance(data, dict):
+        return query
+    if data.get('by') in GROUP_BY_KEYS:
+        query['by'] = data['by']
+    if data.get('sort') in GROUP_SORT_KEYS:
+        query['sort'] = data['sort']
+    try:
+        query['limit'] = min(max(int(data.get('limit', query['limit'])), 1), MAX_GROUPS)
+    except (TypeError, ValueError):
+        pass
+    return query
+
+# Top-K stream: the K heaviest processes by one key, selected with a bounded
+# heap. A process already in a client's top set keeps its place until it
+# falls out of the top K + K * TOP_K_HYSTERESIS, so rows near the cut-off
+# don't flicker in and out between ticks.
+TOP_K_KEYS = {
+    'cpu': lambda proc: proc['cpu_percent'],
+    'memory_mb': lambda proc: proc['memory_mb'],
+    'threads': lambda proc: proc['num_threads'],
+    'io': lambda proc: proc['io_read_rate'] + proc['io_write_rate'],
+    'ctx_switches': lambda proc: proc['ctx_switch_rate']
+}
+DEFAULT_TOP_K_QUERY = {'key': 'cpu', 'k': 20}
+MAX_TOP_K = 200
+TOP_K_HYSTERESIS = 0.25
+
+_top_candidates_cache = {}     # (snapshot version, key, n) -> candidates, for the newest snapshot only
+_top_candidates_lock = threading.Lock()
+
+def top_candidates(snapshot, key, n):
+    """The n heaviest processes of a snapshot by key, heaviest first, shared by all clients"""
+    cache_key = (snapshot.version, key, n)
+    with _top_candidates_lock:
+        candidates = _top_candidates_cache.get(cache_key)
+    if candidates is None:
+        candidates = heapq.nlargest(n, snapshot.processes, key=TOP_K_KEYS[key])
+        with _top_candidates_lock:
+            if any(cached[0] != snapshot.version for cached in _top_candidates_cache):
+                _top_candidates_cache.clear()
+            _top_candidates_cache[cache_key] = candidates
+    return candidates
+
+def select_top_k(snapshot, key, k, members=()):
+    """Pick the top k processes, letting current `members` that slipped just below the cut-off keep their rows.
+    
+    The strict top k is taken first. A member ranked between k and the edge of
+    the hysteresis band may take the row of a newcomer in the last band-width
+    rows of the top k, but only one that doesn't beat it by more than
+    TOP_K_HYSTERESIS; anything further up the ranking always gets in.
+    """
+    slack = math.ceil(k * TOP_K_HYSTERESIS) if members else 0
+    candidates = top_candidates(snapshot, key, k + slack)
+    top = candidates[:k]
+    if not slack:
+        return top
+    
+    members = set(members)
+    value = TOP_K_KEYS[key]
+    # Newcomers near the cut-off, weakest first, and members just below it, strongest first
+    contested = [i for i in range(len(top) - 1, max(len(top) - slack, 0) - 1, -1) if top[i]['pid'] not in members]
+    holdovers = [proc for proc in candidates[k:] if proc['pid'] in members]
+    for proc, i in zip(holdovers, contested):
+        if value(top[i]) > value(proc) * (1 + TOP_K_HYSTERESIS):
+            break
+        top[i] = proc
+    
+    return sorted(top, key=value, reverse=True)
+
+def parse_top_k_query(data, query=None):
+    """Validate a client's top-K query, keeping current values for anything missing or bad"""
+    query = dict(query or DEFAULT_TOP_K_QUERY)
+    if not isinstance(data, dict):
+        return query
+    if data.get('key') in TOP_K_KEYS:
+        query['key'] = data['key']
+    try:
+        query['k'] = min(max(int(data.get('k', query['k'])), 1), MAX_TOP_K)
+    except (TypeError, ValueError):
+        pass
+    return query
+
+# Memory leak detection: a per-PID linear fit of RSS over time
+# Seconds of growth before a PID is flagged; 0 turns leak detection, and its background scans, off
+LEAK_WINDOW = float(os.environ.get('PROCESS_MONITOR_LEAK_WINDOW', '1800'))
+LEAK_MIN_MB_PER_HOUR = 1.0     # slower growth is not reported
+LEAK_MIN_R2 = 0.5              # fits this noisy or sawtoothed are growth by chance, not a leak
+LEAK_MIN_MEMORY_MB = 1.0       # kernel threads and tiny helpers aren't tracked
+DEFAULT_LEAK_LIMIT = 20
+MAX_LEAKS = 200
+
+class LeakDetector:
+    """Flags processes whose RSS keeps growing, ranked by growth rate.
+    
+    Each PID has an exponentially weighted least-squares fit of RSS against
+    time, with samples older than about LEAK_WINDOW fading out. Only the
+    weighted sums are kept, with time measured back from the latest scan, so
+    a PID costs a fixed ten numbers however long it runs. A PID is flagged
+    once its fitted slope has stayed positive for a whole window and the
+    line explains at least LEAK_MIN_R2 of the variance in its RSS.
+    """
+    
+    def __init__(self, window=LEAK_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        # pid -> [create_time, first_seen, positive_since, last_time, s0, sx, sy, sxx, sxy, syy]
+        self._fits = {}
+        self._leaks = []
+    
+    def update(self, processes, now):
+        """Add the RSS of each process from a new scan taken at monotonic time `now` and re-rank the flagged ones"""
+        if self.window <= 0:
+            return
+        fits = {}
+        flagged = []
+        decays = {}
+        window = self.window
+        for proc in processes:
+            rss = proc['memory_mb']
+            if rss < LEAK_MIN_MEMORY_MB:
+                continue
+            pid = proc['pid']
+            create_time = proc.get('create_time')
+            fit = self._fits.get(pid)
+            if fit is None or fit[0] != create_time:
+                fits[pid] = [create_time, now, None, now, 1.0, 0.0, rss, 0.0, 0.0, rss * rss]
+                continue
+            
+            # Move the time origin to now, fade the old samples, then add this one at x = 0.
+            # PIDs from the same scan share one elapsed time, so the decay is computed once
+            elapsed = now - fit[3]
+            decay = decays.get(elapsed)
+            if decay is None:
+                decay = decays[elapsed] = math.exp(-elapsed / window)
+            _, _, _, _, s0, sx, sy, sxx, sxy, syy = fit
+            sxx = (sxx - 2 * elapsed * sx + elapsed * elapsed * s0) * decay
+            sxy = (sxy - elapsed * sy) * decay
+            sx = (sx - elapsed * s0) * decay
+            s0 = s0 * decay + 1
+            sy = sy * decay + rss
+            syy = syy * decay + rss * rss
+            fit[3:] = [now, s0, sx, sy, sxx, sxy, syy]
+            fits[pid] = fit
+            
+            variance = s0 * sxx - sx * sx
+            if variance <= 0:
+                continue
+            slope = (s0 * sxy - sx * sy) / variance  # MB per second
+            if slope <= 0:
+                fit[2] = None
+                continue
+            if fit[2] is None:
+                fit[2] = now
+            if now - fit[2] < window or slope * 3600 < LEAK_MIN_MB_PER_HOUR:
+                continue
+            # Share of the RSS variance the straight line explains: near 1 for a steady leak
+            spread = variance * (s0 * syy - sy * sy)
+            r2 = min((s0 * sxy - sx * sy) ** 2 / spread, 1.0) if spread > 0 else 0.0
+            if r2 >= LEAK_MIN_R2:
+                flagged.append((slope, r2, proc, fit))
+        
+        flagged.sort(key=lambda item: item[0], reverse=True)
+        leaks = [self._leak_row(slope, r2, proc, fit, now) for slope, r2, proc, fit in flagged[:MAX_LEAKS]]
+        with self._lock:
+            self._fits = fits
+            self._leaks = leaks
+    
+    @staticmethod
+    def _leak_row(slope, r2, proc, fit, now):
+        first_seen, positive_since = fit[1], fit[2]
+        return {
+            'pid': proc['pid'],
+            'name': proc['name'],
+            'username': proc['username'],
+            'memory_mb': proc['memory_mb'],
+            'growth_mb_per_hour': round(slope * 3600, 2),
+            'r2': round(r2, 3),
+            'growing_seconds': round(now - positive_since),
+            'tracked_seconds': round(now - first_seen)
+        }
+    
+    def leaks(self, limit=DEFAULT_LEAK_LIMIT):
+        """Flagged processes from the latest scan, fastest growing first"""
+        with self._lock:
+            return self._leaks[:limit]
+
+leak_detector = LeakDetector()
+
+def parse_leak_limit(value):
+    """Validate a requested number of leak rows"""
+    try:
+        return min(max(int(value), 1), MAX_LEAKS)
+    except (TypeError, ValueError):
+        return DEFAULT_LEAK_LIMIT
+
+def parse_process_query(data):
+    """Validate a client's process query, falling back to defaults for bad values"""
+    query = dict(DEFAULT_PROCESS_QUERY)
+    if not isinstance(data, dict):
+        return query
+    
+    query['search'] = str(data.get('search') or '').strip().lower()
+    if data.get('status') in ('all', 'running', 'sleeping', 'stopped', 'zombie', 'disk-sleep'):
+        query['status'] = data['status']
+    if data.get('resource') in ('all', 'high-cpu', 'high-memory'):
+        query['resource'] = data['resource']
+    if data.get('sort') in PROCESS_SORT_KEYS:
+        query['sort'] = data['sort']
+    if data.get('order') in ('asc', 'desc'):
+        query['order'] = data['order']
+    
+    try:
+        query['offset'] = max(int(data.get('offset', 0)), 0)
+        query['limit'] = min(max(int(data.get('limit', DEFAULT_PROCESS_QUERY['limit'])), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        pass
+    
+    return query
+
+def evaluate_process_query(processes, query):
+    """Filter, sort and paginate a process list, returning (page, offset, total)"""
+    search = query['search']
+    status = query['status']
+    resource = query['resource']
+    
+    matches = []
+    for proc in processes:
+        # Apply search filter
+        if search and not (search in proc['name'].lower() or
+                           search in str(proc['pid']) or
+                           (proc['username'] and search in proc['username'].lower())):
+            continue
+        
+        # Apply status filter
+        if status != 'all' and proc['status'] != status:
+            continue
+        
+        # Apply resource filter
+        if resource == 'high-cpu' and proc['cpu_percent'] <= 10:
+            continue
+        if resource == 'high-memory' and proc['memory_percent'] <= 10:
+            continue
+        
+        matches.append(proc)
+    
+    # Clamp the offset to the last page if the list shrank
+    total = len(matches)
+    limit = query['limit']
+    offset = min(query['offset'], max((total - 1) // limit * limit, 0))
+    
+    # Only the rows up to the end of the page need ordering; nlargest and
+    # nsmallest give the same order as a full sort, ties included
+    key = PROCESS_SORT_KEYS[query['sort']]
+    if offset + limit < total:
+        select = heapq.nlargest if query['order'] == 'desc' else heapq.nsmallest
+        matches = select(offset + limit, matches, key=key)
+    else:
+        matches.sort(key=key, reverse=query['order'] == 'desc')
+    
+    return matches[offset:offset + limit], offset, total
+
+def diff_process_lists(previous, current):
+    """Compute added, removed and changed processes between two snapshots keyed by PID"""
+    added = []
+    changed = []
+    
+    for pid, proc in current.items():
+        old_proc = previous.get(pid)
+        if old_proc is None:
+            added.append(proc)
+            continue
+        
+        # Only send the fields that actually changed
+        fields = {key: value for key, value in proc.items() if old_proc.get(key) != value}
+        if fields:
+            fields['pid'] = pid
+            changed.append(fields)
+    
+    removed = [pid for pid in previous if pid not in current]
+    
+    return added, removed, changed
+
+# Compact wire format. Clients that negotiate 'columnar' get process list updates
+# as packed binary frames: a fixed header, a per-frame string table, then one
+# contiguous little-endian column per schema field. Floats are quantized by
+# the field's scale, e.g. cpu_percent travels as an integer count of 0.1%.
+WIRE_FORMAT_VERSION = 1
+WIRE_TYPES = {'u8': 'B', 'u16': 'H', 'u32': 'I', 'f32': 'f', 'f64': 'd', 'str': 'H'}
+WIRE_LIMITS = {'B': 0xFF, 'H': 0xFFFF, 'I': 0xFFFFFFFF}
+PROCESS_WIRE_SCHEMA = [
+    # (field, type, scale)
+    ('pid', 'u32', 1),
+    ('name', 'str', 1),
+    ('status', 'str', 1),
+    ('cpu_percent', 'u32', 10),
+    ('memory_percent', 'u16', 100),
+    ('memory_mb', 'u32', 10),
+    ('num_threads', 'u32', 1),
+    ('username', 'str', 1),
+    ('ppid', 'u32', 1),
+    ('io_read_rate', 'u32', 1),
+    ('io_write_rate', 'u32', 1),
+    ('ctx_switch_rate', 'u32', 1)
+    # create_time and cgroup are left out: the table never shows them and the details modal fetches its own
+]
+METRICS_WIRE_SCHEMA = [
+    ('timestamp', 'f64', 1),
+    ('cpu', 'f32', 1),
+    ('memory_percent', 'f32', 1),
+    ('memory_total', 'f32', 1),
+    ('memory_used', 'f32', 1),
+    ('disk_read', 'f32', 1),
+    ('disk_write', 'f32', 1),
+    ('net_sent', 'f32', 1),
+    ('net_recv', 'f32', 1)
+]
+WIRE_ENCODINGS = ('json', 'columnar')
+
+def _pack_column(values, wire_type, scale):
+    """Pack one column little-endian, quantizing floats into integer types by `scale`"""
+    code = WIRE_TYPES[wire_type]
+    if code in WIRE_LIMITS:
+        if scale != 1:
+            values = [int(value * scale + 0.5) if value else 0 for value in values]
+        try:
+            column = array(code, values)
+        except (OverflowError, TypeError):
+            # Rare out-of-range or missing values: clamp into the type's range
+            limit = WIRE_LIMITS[code]
+            column = array(code, [min(max(int(value or 0), 0), limit) for value in values])
+    else:
+        column = array(code, values)
+    
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+def pack_process_update(update, rows):
+    """Encode a process_list update as a columnar binary frame.
+    
+    Changed processes are sent as whole rows in the same columns as added
+    ones; quantized rows are small enough that per-field patches don't pay.
+    """
+    full = update['type'] == 'full'
+    if full:
+        # Rows are already in page order, so the order list would repeat the pid column
+        rows = update['processes']
+        order = []
+        removed = []
+    else:
+        rows = update['added'] + [rows[change['pid']] for change in update['changed']]
+        order = update['order']
+        removed = update['removed']
+    
+    # Per-frame string table, each distinct string sent once
+    strings = {}
+    columns = []
+    for field, wire_type, scale in PROCESS_WIRE_SCHEMA:
+        values = [row[field] for row in rows]
+        if wire_type == 'str':
+            values = [strings.setdefault(value or '', len(strings)) for value in values]
+        columns.append(_pack_column(values, wire_type, scale))
+    
+    parts = [
+        struct.pack('<BBIIIIIIII', WIRE_FORMAT_VERSION, 0 if full else 1,
+                    update['seq'], update.get('base', 0), update['offset'], update['total'],
+                    len(order), len(removed), len(rows), len(strings))
+    ]
+    for string in strings:
+        encoded = string.encode()[:0xFFFF]
+        parts.append(struct.pack('<H', len(encoded)))
+        parts.append(encoded)
+    parts.append(_pack_column(order, 'u32', 1))
+    parts.append(_pack_column(removed, 'u32', 1))
+    parts.extend(columns)
+    
+    return b''.join(parts)
+
+def pack_metrics(metrics):
+    """Encode system metrics as one packed record in METRICS_WIRE_SCHEMA order.
+    
+    The scalars are followed by each of METRICS_ARRAY_FIELDS as a u16 count
+    and that many f32 values.
+    """
+    parts = [struct.pack(f'<{WIRE_TYPES[wire_type]}', metrics[field])
+             for field, wire_type, _ in METRICS_WIRE_SCHEMA]
+    for field in METRICS_ARRAY_FIELDS:
+        parts.append(struct.pack('<H', len(metrics[field])))
+        parts.append(_pack_column(metrics[field], 'f32', 1))
+    return b''.join(parts)
+
+def json_metrics(metrics):
+    """System metrics for the JSON event, with array fields as packed little-endian float32 bytes"""
+    payload = dict(metrics)
+    for field in METRICS_ARRAY_FIELDS:
+        payload[field] = _pack_column(metrics[field], 'f32', 1)
+    return payload
+
+def metrics_room(encoding):
+    """Room a client receives system metrics through, by wire encoding"""
+    return 'system_metrics_packed' if encoding == 'columnar' else 'system_metrics'
+
+# Compression of large per-client payloads. Each client that negotiates
+# 'deflate' gets its own raw deflate stream that is sync-flushed after every
+# message and never reset, so each frame can refer back to earlier ones, much
+# like permessage-deflate with context takeover. The stream is primed with a
+# dictionary of common field names and values, which the browser inflates and
+# discards to get the same window. The stream is only started by the first
+# frame worth compressing, and a 16 KB window with memLevel 5 keeps it at
+# about 80 KB per client instead of zlib's default 256 KB for the same ratio.
+COMPRESSION_MIN_BYTES = 1024   # smaller payloads are sent as they are
+COMPRESSION_LEVEL = 6
+COMPRESSION_WBITS = 14
+COMPRESSION_MEM_LEVEL = 5
+COMPRESSION_DICTIONARY = ' '.join([
+    # JSON keys and statuses that appear in every process_list update
+    ', '.join(f'"{field}": ' for field, _, _ in PROCESS_WIRE_SCHEMA),
+    '"create_time": "type": "delta", "full", "seq": "base": "order": "offset": "total": '
+    '"added": [], "removed": [], "changed": [], "processes": [',
+    ' '.join(f'"{status}"' for status in PROC_STATUSES.values()),
+    # Common owners and process names
+    '"root" "www-data" "postgres" "mysql" "nobody" "systemd+" "daemon"',
+    '"systemd" "kworker/" "ksoftirqd/" "migration/" "rcu_" "kthreadd" "sshd" "bash" "sh" '
+    '"python3" "python" "node" "java" "nginx" "postgres" "containerd-shim" "dockerd" "cron" "rsyslogd"'
+]).encode()
+
+# Cumulative compression counters, plus the same for the last sampler tick
+compression_stats = {
+    'frames': 0,
+    'bytes_in': 0,
+    'bytes_out': 0,
+    'cpu_seconds': 0.0,
+    'last_tick': {}
+}
+compression_stats_lock = threading.Lock()
+_compression_tick_start = dict(compression_stats)
+
+class ClientCompressor:
+    """One client's raw deflate stream, primed with COMPRESSION_DICTIONARY"""
+    
+    def __init__(self):
+        self._compressor = None
+    
+    @property
+    def started(self):
+        return self._compressor is not None
+    
+    def start(self):
+        """Open the deflate stream and return the compressed dictionary that primes it.
+        
+        Priming is not counted in compression_stats, it is not a message.
+        """
+        self._compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED,
+            -COMPRESSION_WBITS, COMPRESSION_MEM_LEVEL)
+        return self._compressor.compress(COMPRESSION_DICTIONARY) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def compress(self, data):
+        """Compress one message, flushed so the client can inflate it on its own"""
+        started = time.thread_time()
+        compressed = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        
+        with compression_stats_lock:
+            compression_stats['frames'] += 1
+            compression_stats['bytes_in'] += len(data)
+            compression_stats['bytes_out'] += len(compressed)
+            compression_stats['cpu_seconds'] += time.thread_time() - started
+        
+        return compressed
+
+def update_compression_tick_stats():
+    """Record the compression ratio and CPU cost of the tick that just ended"""
+    global _compression_tick_start
+    
+    with compression_stats_lock:
+        current = dict(compression_stats)
+        start, _compression_tick_start = _compression_tick_start, current
+        
+        tick = {key: current[key] - start[key] for key in ('frames', 'bytes_in', 'bytes_out', 'cpu_seconds')}
+        tick['ratio'] = tick['bytes_in'] / tick['bytes_out'] if tick['bytes_out'] else None
+        compression_stats['last_tick'] = tick
+
+def emit_to_client(sid, event, data, state=None):
+    """Emit to one client, deflating large payloads if it negotiated compression.
+    
+    Callers that need ordering hold the client's send_lock, so frames leave
+    in the order they were compressed.
+    """
+    if state is None:
+        with client_snapshots_lock:
+            state = client_process_snapshots.get(sid)
+    compressor = state and state['compressor']
+    if compressor is None:
+        emit(event, data, to=sid)
+        return
+    
+    is_json = not isinstance(data, bytes)
+    raw = json.dumps(data, separators=(',', ':')).encode() if is_json else data
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        emit(event, data, to=sid)
+        return
+    
+    # The first large frame starts the stream, the client inflates and discards the priming
+    if not compressor.started:
+        emit('compressed', {
+            'event': None,
+            'reset': True,
+            'json': False,
+            'size': len(COMPRESSION_DICTIONARY),
+            'data': compressor.start()
+        }, to=sid)
+    
+    emit('compressed', {
+        'event': event,
+        'json': is_json,
+        'size': len(raw),
+        'data': compressor.compress(raw)
+    }, to=sid)
+
+def build_process_list_update(sid, processes, full=False):
+    """Build the process list event and payload for a client's query and remember what it was sent"""
+    with client_snapshots_lock:
+        # Client disconnected while the update was being prepared
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return None
+        query = state['query']
+        encoding = state['encoding']
+    
+    page, offset, total = evaluate_process_query(processes, query)
+    current = {proc['pid']: proc for proc in page}
+    
+    with client_snapshots_lock:
+        if sid not in client_process_snapshots:
+            return None
+        previous = state['processes']
+        base = state['seq']
+        seq = base + 1
+        state['seq'] = seq
+        state['processes'] = current
+    
+    update = {
+        'seq': seq,
+        'order': list(current),
+        'offset': offset,
+        'total': total
+    }
+    
+    # Full resync on connect or when the client asks for it
+    if full or previous is None:
+        update['type'] = 'full'
+        update['processes'] = page
+    else:
+        added, removed, changed = diff_process_lists(previous, current)
+        update.update({
+            'type': 'delta',
+            'base': base,
+            'added': added,
+            'removed': removed,
+            'changed': changed
+        })
+    
+    if encoding == 'columnar':
+        return 'process_list_packed', pack_process_update(update, current)
+    return 'process_list', update
+
+def emit_process_list(sid, processes, full=False):
+    """Send a process list update to a single client"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+    if state is None:
+        return
+    
+    # Keep seq numbers and the compression stream in the order frames are sent
+    with state['send_lock']:
+        message = build_process_list_update(sid, processes, full)
+        if message:
+            emit_to_client(sid, *message, state=state)
+
+# Process details are sent in two parts: the cheap core fields straight away,
+# then each of the expensive sections below as it finishes. Sections walk every
+# fd of the process, so they run on their own pool under a timeout, read at
+# most DETAIL_FD_SCAN_LIMIT fds and are cached briefly per process.
+DETAIL_SECTION_TIMEOUT = 2.0   # seconds before a section is reported as timed out
+DETAIL_CACHE_TTL = 10          # seconds a finished section is reused for
+DETAIL_FD_SCAN_LIMIT = 4096    # fds read before connections are estimated from a sample
+DETAIL_MAX_OPEN_FILES = 10     # paths listed in the open files section
+
+detail_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='details')
+detail_cache = {}              # (pid, create_time, section) -> (expires, value)
+detail_cache_lock = threading.Lock()
+
+def _sample_fd_targets(proc):
+    """Return (number of fds, link targets of at most DETAIL_FD_SCAN_LIMIT evenly spaced fds).
+    
+    Returns None where /proc/<pid>/fd is not available.
+    """
+    fd_dir = f'/proc/{proc.pid}/fd'
+    try:
+        fds = os.listdir(fd_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except PermissionError:
+        raise psutil.AccessDenied(proc.pid)
+    
+    # fds are listed in ascending order, so a stride covers the whole table
+    step = -(-len(fds) // DETAIL_FD_SCAN_LIMIT) if fds else 1
+    targets = []
+    for fd in fds[::step]:
+        try:
+            targets.append(os.readlink(f'{fd_dir}/{fd}'))
+        except PermissionError:
+            raise psutil.AccessDenied(proc.pid)
+        except OSError:  # fd closed while scanning
+            continue
+    return len(fds), targets
+
+def _count_inet_connections(pid, inodes):
+    """Count the TCP/UDP table rows owned by the given socket inodes, as net_connections() would"""
+    count = 0
+    for table in ('tcp', 'tcp6', 'udp', 'udp6'):
+        try:
+            with open(f'/proc/{pid}/net/{table}') as f:
+                next(f, None)  # header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) > 9 and fields[9] in inodes:
+                        count += 1
+        except FileNotFoundError:  # e.g. IPv6 disabled
+            continue
+        except PermissionError:
+            raise psutil.AccessDenied(pid)
+    return count
+
+def probe_connections(proc):
+    """Number of network connections, estimated from a sample of fds for very large fd tables"""
+    sample = _sample_fd_targets(proc)
+    if sample is None:
+        connections = getattr(proc, 'net_connections', proc.connections)()
+        return str(len(connections))
+    
+    num_fds, targets = sample
+    if num_fds <= DETAIL_FD_SCAN_LIMIT:
+        # Every fd was read already, so match its socket inodes instead of having psutil rescan the table
+        inodes = {target[8:-1] for target in targets if target.startswith('socket:[')}
+        return str(_count_inet_connections(proc.pid, inodes) if inodes else 0)
+    
+    # Matching every socket against /proc/net/* would take seconds, so count
+    # socket fds in the sample and scale up
+    sockets = sum(target.startswith('socket:') for target in targets)
+    estimate = round(sockets * num_fds / len(targets)) if targets else 0
+    return f"~{estimate} sockets (sampled {len(targets)} of {num_fds} fds)"
+
+def probe_open_files(proc):
+    """Up to DETAIL_MAX_OPEN_FILES open file paths and the total number of fds"""
+    sample = _sample_fd_targets(proc)
+    if sample is None:
+        open_files = [f.path for f in proc.open_files()]
+        total = len(open_files)
+    else:
+        total, targets = sample
+        open_files = [target for target in targets if target.startswith('/')]
+    
+    if not open_files:
+        return "None"
+    text = "\n".join(open_files[:DETAIL_MAX_OPEN_FILES])
+    if total > DETAIL_MAX_OPEN_FILES:
+        text += f"\n... {total} fds in total"
+    return text
+
+DETAIL_SECTIONS = {
+    'connections': probe_connections,
+    'open_files': probe_open_files
+}
+
+def _run_detail_section(proc, create_time, section):
+    """Run one section probe, caching the result"""
+    try:
+        value = DETAIL_SECTIONS[section](proc)
+    except psutil.AccessDenied:
+        value = "Access denied"
+    except psutil.NoSuchProcess:
+        return "Process no longer exists"
+    except Exception as e:
+        value = f"N/A ({e})"
+    
+    with detail_cache_lock:
+        detail_cache[(proc.pid, create_time, section)] = (time.monotonic() + DETAIL_CACHE_TTL, value)
+    return value
+
+def stream_process_detail_sections(pid, send):
+    """Compute the expensive detail sections, calling send(section, value) as each finishes"""
+    try:
+        proc = process_handles.get(pid)
+        create_time = proc.create_time()
+    except psutil.Error:
+        return
+    
+    now = time.monotonic()
+    futures = {}
+    with detail_cache_lock:
+        # Drop expired entries while we hold the lock
+        for key in [key for key, (expires, _) in detail_cache.items() if expires <= now]:
+            del detail_cache[key]
+        cached = {section: detail_cache.get((pid, create_time, section)) for section in DETAIL_SECTIONS}
+    
+    for section, entry in cached.items():
+        if entry:
+            send(section, entry[1])
+        else:
+            futures[detail_executor.submit(_run_detail_section, proc, create_time, section)] = section
+    
+    # A timed-out probe keeps running and caches its result for the next request
+    try:
+        for future in as_completed(futures, timeout=DETAIL_SECTION_TIMEOUT):
+            send(futures[future], future.result())
+    except FuturesTimeout:
+        for future, section in futures.items():
+            if not future.done():
+                send(section, f"Timed out after {DETAIL_SECTION_TIMEOUT:g}s")
+
+def sampled_process_row(proc):
+    """Return the latest sampler row for a process handle, or None if it is not the same process"""
+    snapshot = latest_snapshot
+    row = snapshot.process(proc.pid) if snapshot else None
+    # Process.create_time() is cached on the handle, so this check is free
+    if row and row['create_time'] == format_create_time(proc.create_time()):
+        return row
+    return None
+
+def emit_process_tree(sid):
+    """Send a client the process tree with the nodes it has expanded"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        expanded = dict(state['tree_expanded'])
+    
+    tree = process_tree.subtree(expanded=expanded)
+    with state['send_lock']:
+        emit_to_client(sid, 'process_tree', tree, state=state)
+
+def emit_process_groups(sid):
+    """Send a client the process groups for its group-by query"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        query = dict(state['group_query'])
+    
+    groups = process_groups.query(**query)
+    with state['send_lock']:
+        emit_to_client(sid, 'process_groups', groups, state=state)
+
+def emit_process_top(sid):
+    """Send a client its top-K processes, keeping last tick's members where hysteresis allows"""
+    snapshot = latest_snapshot
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None or snapshot is None:
+            return
+        query = dict(state['top_query'])
+        members = state['top_members']
+    
+    top = select_top_k(snapshot, query['key'], query['k'], members)
+    with client_snapshots_lock:
+        state['top_members'] = [proc['pid'] for proc in top]
+    
+    with state['send_lock']:
+        emit_to_client(sid, 'process_top', {
+            'key': query['key'],
+            'k': query['k'],
+            'total': len(snapshot.processes),
+            'processes': top
+        }, state=state)
+
+def emit_process_leaks(sid):
+    """Send a client the processes flagged as leaking memory"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+    if state is None:
+        return
+    
+    with state['send_lock']:
+        emit_to_client(sid, 'process_leaks', {
+            'window': leak_detector.window,
+            'processes': leak_detector.leaks()
+        }, state=state)
+
+# Senders for the process streams other than process_list, which has its own delta protocol
+PROCESS_STREAM_EMITTERS = {
+    'process_tree': emit_process_tree,
+    'process_groups': emit_process_groups,
+    'process_top': emit_process_top,
+    'process_leaks': emit_process_leaks
+}
+
+def get_process_details(pid):
+    """Get the core details of a process; see stream_process_detail_sections for the rest"""
+    try:
+        proc = process_handles.get(pid)
+        
+        # Basic info, read in one oneshot() pass so /proc/<pid>/stat and
+        # status are parsed once. cpu_percent would reset the CPU% baseline
+        # of a handle the sampler may share, so it comes from the latest scan.
+        info = proc.as_dict(attrs=[
+            'pid', 'name', 'status', 'username', 'memory_percent', 'memory_info',
+            'num_threads', 'create_time', 'nice', 'ppid', 'cwd', 'exe', 'cmdline',
+            'terminal', 'cpu_times', 'io_counters'
+        ])
+        row = sampled_process_row(proc)
+        info['cpu_percent'] = row['cpu_percent'] if row else 0.0
+        
+        # Convert create time to readable format
+        info['create_time'] = format_create_time(info['create_time'])
+        
+        # Calculate memory in MB
+        info['memory_mb'] = info['memory_info'].rss / (1024 * 1024) if info['memory_info'] else 0
+        
+        # Additional info
+        cpu_times = info.pop('cpu_times')
+        if cpu_times:
+            info['cpu_times'] = f"User: {cpu_times.user:.2f}s, System: {cpu_times.system:.2f}s"
+        else:
+            info['cpu_times'] = "N/A"
+        
+        io_counters = info.pop('io_counters')
+        if io_counters:
+            info['io_read'] = f"{io_counters.read_bytes / (1024 * 1024):.2f} MB"
+            info['io_write'] = f"{io_counters.write_bytes / (1024 * 1024):.2f} MB"
+        else:
+            info['io_read'] = "N/A"
+            info['io_write'] = "N/A"
+        
+        # Sent separately as process_details_section events
+        info['pending_sections'] = list(DETAIL_SECTIONS)
+            
+        # Convert cmdline list to string
+        if info['cmdline']:
+            info['cmdline'] = " ".join(info['cmdline'])
+        else:
+            info['cmdline'] = "N/A"
+            
+        return info
+        
+    except psutil.NoSuchProcess:
+        return {"error": "Process no longer exists"}
+    except psutil.AccessDenied:
+        return {"error": "Access denied to process information"}
+    except Exception as e:
+        return {"error": f"Error retrieving process details: {str(e)}"}
+
+def process_name(proc):
+    """Process name for action replies, from the latest scan when possible"""
+    row = sampled_process_row(proc)
+    return row['name'] if row else proc.name()
+
+def kill_process(pid, force=False):
+    """Kill a process by PID"""
+    try:
+        proc = process_handles.get(pid)
+        proc_name = process_name(proc)
         
         if force:
             proc.kill()  # SIGKILL
@@ -1287,8 +4026,8 @@ def kill_process(pid, force=False):
 def suspend_process(pid):
     """Suspend a process by PID"""
     try:
-        proc = psutil.Process(pid)
-        proc_name = proc.name()
+        proc = process_handles.get(pid)
+        proc_name = process_name(proc)
         
         proc.suspend()
         return {"success": True, "pid": pid, "name": proc_name}
@@ -1303,8 +4042,8 @@ def suspend_process(pid):
 def resume_process(pid):
     """Resume a suspended process by PID"""
     try:
-        proc = psutil.Process(pid)
-        proc_name = proc.name()
+        proc = process_handles.get(pid)
+        proc_name = process_name(proc)
         
         proc.resume()
         return {"success": True, "pid": pid, "name": proc_name}
@@ -1316,97 +4055,1186 @@ def resume_process(pid):
     except Exception as e:
         return {"success": False, "error": f"Error resuming process: {str(e)}", "pid": pid}
 
-def background_task():
-    """Background task to emit metrics periodically"""
-    global auto_refresh_enabled
+class MetricsRingBuffer:
+    """Fixed-size ring of recent system metric samples.
+    
+    Each field is a preallocated array('d') column, so memory stays bounded
+    however long the monitor runs and reads can be sent column-wise.
+    """
+    
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._columns = {field: array('d', bytes(8 * capacity)) for field in fields}
+        self._next = 0
+        self._count = 0
+    
+    def append(self, metrics):
+        """Store one sample, overwriting the oldest once the buffer is full"""
+        with self._lock:
+            i = self._next
+            self._timestamps[i] = metrics['timestamp']
+            for field in self.fields:
+                self._columns[field][i] = metrics[field]
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+    
+    def _ordered(self, column, count):
+        """Return the newest count values of a column, oldest first"""
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return column[start:start + count]
+        return column[start:] + column[:self._next]
+    
+    def recent(self, seconds):
+        """Return samples from the last `seconds` as packed little-endian columns.
+        
+        Timestamps are float64 and metric values float32, each as bytes, ready
+        to be read with Float64Array/Float32Array in the browser.
+        """
+        with self._lock:
+            timestamps = self._ordered(self._timestamps, self._count)
+            
+            # Timestamps are ascending, so skip the samples that are too old
+            cutoff = time.time() - seconds
+            skip = next((i for i, ts in enumerate(timestamps) if ts >= cutoff), len(timestamps))
+            count = len(timestamps) - skip
+            
+            columns = {'timestamps': timestamps[skip:]}
+            for field in self.fields:
+                columns[field] = array('f', self._ordered(self._columns[field], count))
+        
+        if sys.byteorder == 'big':
+            for column in columns.values():
+                column.byteswap()
+        
+        return {name: column.tobytes() for name, column in columns.items()}
+
+metrics_history = MetricsRingBuffer(METRICS_HISTORY_SIZE, METRICS_HISTORY_FIELDS)
+
+class HistoryStore:
+    """On-disk time-series history of system and per-process metrics.
+    
+    Samples are buffered in memory and written in batches by a writer thread
+    to an SQLite database in WAL mode. Each batch is rolled up into coarser
+    tiers (see HISTORY_TIERS) and rows older than a tier's retention are
+    pruned, so long time ranges are read from a small number of rows.
+    
+    Process rows skip idle samples (see PROCESS_HISTORY_MIN_MEMORY_MB), so a
+    process's rolled-up averages cover only the samples where it was active.
+    """
     
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._system_rows = []
+        self._process_rows = []
+        self._last_prune = 0
+        
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        metric_columns = ', '.join(f'{metric} REAL' for metric in HISTORY_SYSTEM_METRICS)
+        conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS system_history (
+                tier INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                {metric_columns},
+                PRIMARY KEY (tier, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS process_history (
+                tier INTEGER NOT NULL,
+                pid INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                name TEXT,
+                samples INTEGER NOT NULL,
+                cpu_percent REAL,
+                memory_mb REAL,
+                PRIMARY KEY (tier, pid, ts)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS process_history_ts ON process_history (tier, ts);
+        ''')
+        conn.close()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+    
+    def record(self, snapshot):
+        """Buffer the parts of a snapshot that were updated for the next batched write"""
+        ts = int(snapshot.timestamp)
+        system_rows = []
+        process_rows = []
+        
+        if snapshot.metrics_updated:
+            system_rows.append((ts,) + tuple(snapshot.metrics[metric] for metric in HISTORY_SYSTEM_METRICS))
+        
+        # Idle, small processes would only add noise and volume
+        if snapshot.processes_updated:
+            process_rows = [
+                (proc['pid'], ts, proc['name'], proc['cpu_percent'], proc['memory_mb'])
+                for proc in snapshot.processes
+                if proc['cpu_percent'] > 0 or proc['memory_mb'] >= PROCESS_HISTORY_MIN_MEMORY_MB
+            ]
+        
+        with self._lock:
+            self._system_rows.extend(system_rows)
+            self._process_rows.extend(process_rows)
+    
+    def flush(self):
+        """Write buffered samples, update the rollup tiers and prune expired rows"""
+        with self._lock:
+            system_rows, self._system_rows = self._system_rows, []
+            process_rows, self._process_rows = self._process_rows, []
+        
+        if not system_rows and not process_rows:
+            return
+        
+        start = min(row[0] for row in system_rows) if system_rows else min(row[1] for row in process_rows)
+        base_tier = HISTORY_TIERS[0][0]
+        metric_columns = ', '.join(HISTORY_SYSTEM_METRICS)
+        placeholders = ', '.join('?' for _ in HISTORY_SYSTEM_METRICS)
+        
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO system_history (tier, ts, samples, {metric_columns}) '
+                    f'VALUES ({base_tier}, ?, 1, {placeholders})',
+                    system_rows
+                )
+                conn.executemany(
+                    'INSERT OR REPLACE INTO process_history (tier, pid, ts, name, samples, cpu_percent, memory_mb) '
+                    f'VALUES ({base_tier}, ?, ?, ?, 1, ?, ?)',
+                    process_rows
+                )
+                
+                # Recompute only the coarser buckets touched by this batch
+                for (source, _), (target, _) in zip(HISTORY_TIERS, HISTORY_TIERS[1:]):
+                    bucket_start = start // target * target
+                    averages = ', '.join(
+                        f'SUM({metric} * samples) / SUM(samples)' for metric in HISTORY_SYSTEM_METRICS
+                    )
+                    conn.execute(
+                        f'INSERT OR REPLACE INTO system_history (tier, ts, samples, {metric_columns}) '
+                        f'SELECT {target}, ts / {target} * {target} AS bucket, SUM(samples), {averages} '
+                        f'FROM system_history WHERE tier = ? AND ts >= ? GROUP BY bucket',
+                        (source, bucket_start)
+                    )
+                    conn.execute(
+                        'INSERT OR REPLACE INTO process_history (tier, pid, ts, name, samples, cpu_percent, memory_mb) '
+                        f'SELECT {target}, pid, ts / {target} * {target} AS bucket, MAX(name), SUM(samples), '
+                        'SUM(cpu_percent * samples) / SUM(samples), SUM(memory_mb * samples) / SUM(samples) '
+                        'FROM process_history WHERE tier = ? AND ts >= ? GROUP BY pid, bucket',
+                        (source, bucket_start)
+                    )
+                
+                # Prune expired rows about once a minute
+                now = time.time()
+                if now - self._last_prune >= 60:
+                    self._last_prune = now
+                    for tier, retention in HISTORY_TIERS:
+                        conn.execute('DELETE FROM system_history WHERE tier = ? AND ts < ?', (tier, now - retention))
+                        conn.execute('DELETE FROM process_history WHERE tier = ? AND ts < ?', (tier, now - retention))
+        finally:
+            conn.close()
+    
+    def _pick_tier(self, start, end, max_points):
+        """Pick the finest tier that covers the range within max_points"""
+        now = time.time()
+        for tier, retention in HISTORY_TIERS:
+            if (end - start) / tier <= max_points and start >= now - retention:
+                return tier
+        return HISTORY_TIERS[-1][0]
+    
+    def query(self, start, end, max_points=2000, pid=None):
+        """Return a time range of system (or one process's) history at a suitable resolution"""
+        tier = self._pick_tier(start, end, max_points)
+        
+        conn = self._connect()
+        try:
+            if pid is None:
+                columns = HISTORY_SYSTEM_METRICS
+                rows = conn.execute(
+                    f'SELECT ts, {", ".join(columns)} FROM system_history '
+                    'WHERE tier = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                    (tier, start, end)
+                ).fetchall()
+            else:
+                columns = ('cpu_percent', 'memory_mb')
+                rows = conn.execute(
+                    'SELECT ts, cpu_percent, memory_mb FROM process_history '
+                    'WHERE tier = ? AND pid = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                    (tier, pid, start, end)
+                ).fetchall()
+        finally:
+            conn.close()
+        
+        # Columnar result: one list per metric
+        result = {'resolution': tier, 'timestamps': [row[0] for row in rows]}
+        for i, column in enumerate(columns, start=1):
+            result[column] = [row[i] for row in rows]
+        return result
+
+def history_writer_task():
+    """Background task that flushes buffered history samples to disk"""
     while True:
+        time.sleep(HISTORY_FLUSH_INTERVAL)
+        try:
+            history_store.flush()
+        except Exception as e:
+            logger.error(f"Error writing history: {e}")
+
+# Opened by start_history_store() when the server starts, so importing the module touches no files
+history_store = None
+
+def start_history_store():
+    """Open the history database and start its writer, or leave history disabled if it is not configured or unusable"""
+    global history_store
+    if not HISTORY_DB_PATH:
+        return
+    try:
+        history_store = HistoryStore(HISTORY_DB_PATH)
+    except sqlite3.Error as e:
+        logger.warning(f"History storage disabled, could not open {HISTORY_DB_PATH}: {e}")
+        return
+    threading.Thread(target=history_writer_task, daemon=True).start()
+
+# Alerting: rules evaluated on every sampler tick, with alerts sent to the
+# dashboard, the log and optionally a JSON-lines file and a webhook
+ALERT_RULES_PATH = os.environ.get('PROCESS_MONITOR_ALERT_RULES', '')
+ALERT_LOG_PATH = os.environ.get('PROCESS_MONITOR_ALERT_LOG', '')
+ALERT_WEBHOOK_URL = os.environ.get('PROCESS_MONITOR_ALERT_WEBHOOK', '')
+ALERT_WEBHOOK_TIMEOUT = 5.0    # seconds before a webhook post is given up
+ALERT_HISTORY_SIZE = 200       # fired and resolved alerts kept for /api/alerts
+ALERT_SEVERITIES = ('info', 'warning', 'critical')
+ALERT_METRICS = tuple(field for field, _, _ in METRICS_WIRE_SCHEMA if field != 'timestamp')
+
+# Used when PROCESS_MONITOR_ALERT_RULES doesn't name a rules file
+DEFAULT_ALERT_RULES = [
+    {'name': 'cpu_high', 'type': 'threshold', 'metric': 'cpu', 'above': 90, 'clear': 80, 'for': 60, 'severity': 'critical'},
+    {'name': 'memory_high', 'type': 'threshold', 'metric': 'memory_percent', 'above': 90, 'clear': 85, 'for': 60, 'severity': 'critical'},
+    {'name': 'net_sent_anomaly', 'type': 'anomaly', 'metric': 'net_sent', 'z': 4, 'for': 10},
+    {'name': 'zombie_process', 'type': 'zombie', 'severity': 'info'},
+    {'name': 'rss_growth', 'type': 'rss_growth', 'mb_per_hour': 100}
+]
+
+class AlertRule:
+    """Base for alert rules.
+    
+    check() returns (key, value, breached, cleared) for whatever the rule
+    watches: key is None for system-wide rules and a PID for per-process ones.
+    The engine turns these into alerts: a key must stay breached for `for`
+    seconds before it fires and then stays firing until it is cleared, so a
+    value hovering around the limit doesn't flap.
+    """
+    
+    # 'metrics' rules run on metric ticks, 'processes' rules on process scans
+    source = 'metrics'
+    
+    def __init__(self, name, severity='warning', for_seconds=0):
+        if severity not in ALERT_SEVERITIES:
+            raise ValueError(f"severity must be one of {', '.join(ALERT_SEVERITIES)}")
+        self.name = name
+        self.severity = severity
+        self.for_seconds = float(for_seconds)
+    
+    def check(self, snapshot):
+        raise NotImplementedError
+    
+    def describe(self, key, value, snapshot):
+        raise NotImplementedError
+
+def _metric_name(spec):
+    metric = spec.get('metric')
+    if metric not in ALERT_METRICS:
+        raise ValueError(f"metric must be one of {', '.join(ALERT_METRICS)}")
+    return metric
+
+class ThresholdRule(AlertRule):
+    """A system metric above (or below) a limit, cleared once it is back past `clear`"""
+    
+    def __init__(self, spec):
+        super().__init__(spec['name'], spec.get('severity', 'warning'), spec.get('for', 0))
+        self.metric = _metric_name(spec)
+        if ('above' in spec) == ('below' in spec):
+            raise ValueError("threshold rules need exactly one of 'above' or 'below'")
+        self.above = 'above' in spec
+        self.limit = float(spec['above' if self.above else 'below'])
+        self.clear = float(spec.get('clear', self.limit))
+    
+    def check(self, snapshot):
+        value = snapshot.metrics[self.metric]
+        if self.above:
+            return [(None, value, value > self.limit, value <= self.clear)]
+        return [(None, value, value < self.limit, value >= self.clear)]
+    
+    def describe(self, key, value, snapshot):
+        op = '>' if self.above else '<'
+        return f"{self.metric} is {value:.1f} ({op} {self.limit:g} for {self.for_seconds:g}s)"
+
+class AnomalyRule(AlertRule):
+    """A system metric more than `z` standard deviations from its exponentially weighted mean"""
+    
+    def __init__(self, spec):
+        super().__init__(spec['name'], spec.get('severity', 'warning'), spec.get('for', 0))
+        self.metric = _metric_name(spec)
+        self.z = float(spec.get('z', 4))
+        self.clear = float(spec.get('clear', self.z / 2))
+        self.alpha = 2 / (int(spec.get('span', 60)) + 1)
+        self.min_samples = int(spec.get('min_samples', 30))
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+        self.baseline = 0.0   # mean the last value was scored against
+    
+    def check(self, snapshot):
+        value = snapshot.metrics[self.metric]
+        deviation = value - self.mean
+        # No verdict until the baseline has settled
+        score = deviation / math.sqrt(self.variance) if self.samples >= self.min_samples and self.variance > 0 else 0.0
+        
+        # EWMA mean and variance, updated after scoring so a spike doesn't mask itself
+        self.baseline = self.mean
+        increment = self.alpha * deviation
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + deviation * increment)
+        self.samples += 1
+        return [(None, score, score >= self.z, score < self.clear)]
+    
+    def describe(self, key, value, snapshot):
+        return f"{self.metric} is {snapshot.metrics[self.metric]:.2f}, {value:.1f} standard deviations above its usual {self.baseline:.2f}"
+
+class ZombieRule(AlertRule):
+    """One alert per zombie process, resolved when its parent reaps it"""
+    
+    source = 'processes'
+    
+    def __init__(self, spec):
+        super().__init__(spec['name'], spec.get('severity', 'warning'), spec.get('for', 0))
+    
+    def check(self, snapshot):
+        return [(proc['pid'], 1, True, False) for proc in snapshot.zombies()]
+    
+    def describe(self, key, value, snapshot):
+        proc = snapshot.process(key)
+        ppid = proc.get('ppid') if proc else None
+        return f"PID {key} ({proc['name'] if proc else '?'}) is a zombie, parent PID {ppid}"
+
+class RSSGrowthRule(AlertRule):
+    """A process the leak detector has flagged, growing faster than `mb_per_hour`.
+    
+    The slopes come from leak_detector, so this rule and the Memory Leaks
+    list always agree, and the rule only looks at the flagged processes.
+    """
+    
+    source = 'processes'
+    
+    def __init__(self, spec):
+        super().__init__(spec['name'], spec.get('severity', 'warning'), spec.get('for', 0))
+        if leak_detector.window <= 0:
+            raise ValueError("leak detection is off (PROCESS_MONITOR_LEAK_WINDOW=0)")
+        self.mb_per_hour = float(spec['mb_per_hour'])
+        self.clear = float(spec.get('clear', self.mb_per_hour / 2))
+    
+    def check(self, snapshot):
+        return [(leak['pid'], leak['growth_mb_per_hour'],
+                 leak['growth_mb_per_hour'] >= self.mb_per_hour, leak['growth_mb_per_hour'] < self.clear)
+                for leak in leak_detector.leaks(MAX_LEAKS)]
+    
+    def describe(self, key, value, snapshot):
+        proc = snapshot.process(key)
+        return (f"PID {key} ({proc['name'] if proc else '?'}) RSS is growing {value:.1f} MB/h, "
+                f"now {proc['memory_mb'] if proc else 0:.0f} MB")
+
+ALERT_RULE_TYPES = {
+    'threshold': ThresholdRule,
+    'anomaly': AnomalyRule,
+    'zombie': ZombieRule,
+    'rss_growth': RSSGrowthRule
+}
+
+def load_alert_rules(specs):
+    """Build rules from their JSON specs, logging and skipping invalid ones"""
+    rules = []
+    names = set()
+    for spec in specs:
         try:
-            # Get system metrics
-            metrics = get_system_metrics()
-            socketio.emit('system_metrics', metrics)
+            rule_type = ALERT_RULE_TYPES.get(spec.get('type'))
+            if rule_type is None:
+                raise ValueError(f"type must be one of {', '.join(ALERT_RULE_TYPES)}")
+            if not spec.get('name') or spec['name'] in names:
+                raise ValueError("rules need a unique name")
+            rule = rule_type(spec)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping alert rule {spec!r}: {e}")
+            continue
+        names.add(rule.name)
+        rules.append(rule)
+    return rules
+
+def _read_alert_rules():
+    if not ALERT_RULES_PATH:
+        return DEFAULT_ALERT_RULES
+    try:
+        with open(ALERT_RULES_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Using the default alert rules, could not read {ALERT_RULES_PATH}: {e}")
+        return DEFAULT_ALERT_RULES
+
+class AlertEngine:
+    """Evaluates alert rules against each snapshot and hands alert changes to the sinks.
+    
+    Only the sampler thread calls evaluate(). Pending and firing alerts are
+    indexed by rule, so a rule's cost is its check() plus a dict lookup per
+    key it reports or still has open. Rules on system metrics are O(1) per
+    tick, and process rules only report the processes that matter to them.
+    """
+    
+    def __init__(self, rules, sinks=()):
+        self.rules = rules
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+        self._pending = {rule.name: {} for rule in rules}   # rule name -> key -> time first breached
+        self._active = {rule.name: {} for rule in rules}    # rule name -> key -> firing alert
+        self._history = deque(maxlen=ALERT_HISTORY_SIZE)
+        self._next_id = 1
+        self.process_rules = sum(rule.source == 'processes' for rule in rules)
+        self.stats = {'rules': len(rules), 'fired': 0, 'resolved': 0, 'last_eval_seconds': 0.0}
+    
+    def evaluate(self, snapshot):
+        """Run the rules whose source was updated in this snapshot"""
+        started = time.perf_counter()
+        now = snapshot.timestamp
+        changes = []
+        for rule in self.rules:
+            if not (snapshot.metrics_updated if rule.source == 'metrics' else snapshot.processes_updated):
+                continue
+            try:
+                results = rule.check(snapshot)
+            except Exception as e:
+                logger.error(f"Error in alert rule {rule.name}: {e}")
+                continue
+            pending = self._pending[rule.name]
+            active = self._active[rule.name]
+            seen = set()
+            for key, value, breached, cleared in results:
+                seen.add(key)
+                change = self._update(rule, pending, active, key, value, breached, cleared, now, snapshot)
+                if change:
+                    changes.append(change)
+            
+            # Per-process keys that weren't reported this time (e.g. the process exited) are cleared
+            if rule.source == 'processes':
+                for key in [key for key in pending if key not in seen]:
+                    del pending[key]
+                for key in [key for key in active if key not in seen]:
+                    changes.append(self._resolve(active, key, now))
+        
+        with self._lock:
+            self.stats['last_eval_seconds'] = time.perf_counter() - started
+        for alert in changes:
+            for sink in self.sinks:
+                try:
+                    sink(alert)
+                except Exception as e:
+                    logger.error(f"Error in alert sink: {e}")
+    
+    def _update(self, rule, pending, active, key, value, breached, cleared, now, snapshot):
+        alert = active.get(key)
+        if alert is not None:
+            if cleared:
+                return self._resolve(active, key, now)
+            alert['value'] = value
+            return None
+        
+        if not breached:
+            pending.pop(key, None)
+            return None
+        since = pending.setdefault(key, now)
+        if now - since < rule.for_seconds:
+            return None
+        
+        del pending[key]
+        with self._lock:
+            alert = {
+                'id': self._next_id,
+                'rule': rule.name,
+                'severity': rule.severity,
+                'key': key,
+                'value': value,
+                'message': rule.describe(key, value, snapshot),
+                'state': 'firing',
+                'started': since,
+                'resolved': None
+            }
+            self._next_id += 1
+            active[key] = alert
+            self.stats['fired'] += 1
+        return dict(alert)
+    
+    def _resolve(self, active, key, now):
+        with self._lock:
+            alert = active.pop(key)
+            alert['state'] = 'resolved'
+            alert['resolved'] = now
+            self._history.append(alert)
+            self.stats['resolved'] += 1
+        return dict(alert)
+    
+    def active(self):
+        """Alerts currently firing, oldest first"""
+        with self._lock:
+            alerts = [dict(alert) for rule_alerts in self._active.values() for alert in rule_alerts.values()]
+        return sorted(alerts, key=lambda alert: alert['id'])
+    
+    def history(self):
+        """Recently resolved alerts, newest first"""
+        with self._lock:
+            return [dict(alert) for alert in reversed(self._history)]
+    
+    def statistics(self):
+        """Copy of the rule count, fired and resolved totals and last evaluation time"""
+        with self._lock:
+            return dict(self.stats)
+
+def log_alert(alert):
+    """Alert sink: the monitor's log, plus a JSON-lines file if PROCESS_MONITOR_ALERT_LOG is set"""
+    level = logging.WARNING if alert['state'] == 'firing' and alert['severity'] != 'info' else logging.INFO
+    logger.log(level, f"Alert {alert['rule']} {alert['state']}: {alert['message']}")
+    if ALERT_LOG_PATH:
+        try:
+            with open(ALERT_LOG_PATH, 'a') as f:
+                f.write(json.dumps(alert) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write alert log {ALERT_LOG_PATH}: {e}")
+
+# Webhook posts run off the sampler thread so a slow receiver can't delay ticks
+alert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alerts')
+
+def _post_webhook(alert):
+    body = json.dumps(alert).encode()
+    webhook = urllib.request.Request(ALERT_WEBHOOK_URL, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(webhook, timeout=ALERT_WEBHOOK_TIMEOUT):
+            pass
+    except OSError as e:
+        logger.warning(f"Alert webhook {ALERT_WEBHOOK_URL} failed: {e}")
+
+def webhook_alert(alert):
+    """Alert sink: POST the alert as JSON to PROCESS_MONITOR_ALERT_WEBHOOK"""
+    alert_executor.submit(_post_webhook, alert)
+
+def socket_alert(alert):
+    """Alert sink: every connected dashboard"""
+    emit('alert', alert, to='alerts')
+
+alert_engine = AlertEngine(load_alert_rules(_read_alert_rules()),
+                           [log_alert, socket_alert] + ([webhook_alert] if ALERT_WEBHOOK_URL else []))
+
+def take_snapshot(collect_metrics=True, collect_processes=True):
+    """Collect a new snapshot and publish it as the newest one"""
+    global latest_snapshot
+    
+    previous = latest_snapshot
+    collect_metrics = collect_metrics or previous is None
+    collect_processes = collect_processes or previous is None
+    
+    metrics = metrics_sampler.sample() if collect_metrics else previous.metrics
+    if collect_metrics:
+        device_io_sampler.sample()
+    
+    if collect_processes:
+        # Record the CPU the scan cost across all workers so the sampler can back off
+        started = time.thread_time()
+        processes = get_process_list()
+        process_tree.update(processes)
+        process_groups.update(processes)
+        # Monotonic, so a wall clock step doesn't stretch or reverse the fits' time axis
+        leak_detector.update(processes, time.monotonic())
+        cost = time.thread_time() - started
+        if sampler_stats['scan']['workers'] > 1:
+            # Shards ran on the pool's threads, not this one
+            cost += sampler_stats['scan']['cpu_seconds']
+        with sampler_stats_lock:
+            sampler_stats['process_cost'] = cost
+        process_timestamp = time.time()
+    else:
+        processes = previous.processes
+        process_timestamp = previous.process_timestamp
+    
+    with snapshot_condition:
+        version = latest_snapshot.version + 1 if latest_snapshot else 1
+        snapshot = Snapshot(version, metrics, processes, process_timestamp, collect_metrics, collect_processes)
+        latest_snapshot = snapshot
+        snapshot_condition.notify_all()
+    
+    if snapshot.metrics_updated:
+        metrics_history.append(metrics)
+    if history_store:
+        history_store.record(snapshot)
+    alert_engine.evaluate(snapshot)
+    
+    return snapshot
+
+def get_latest_snapshot(timeout=10):
+    """Return the newest snapshot, waiting for the sampler's first tick if needed"""
+    with snapshot_condition:
+        snapshot_condition.wait_for(lambda: latest_snapshot is not None, timeout)
+        return latest_snapshot
+
+def get_fresh_snapshot(timeout=10):
+    """Return the newest snapshot, first having the sampler rescan if its process list is
+    older than PROCESS_MAX_INTERVAL, as it can be while no dashboard subscribes to it"""
+    global scan_requested
+    snapshot = get_latest_snapshot(timeout)
+    if snapshot is None or time.time() - snapshot.process_timestamp < PROCESS_MAX_INTERVAL:
+        return snapshot
+    
+    requested = time.time()
+    with snapshot_condition:
+        scan_requested = True
+    refresh_event.set()
+    with snapshot_condition:
+        snapshot_condition.wait_for(lambda: latest_snapshot.process_timestamp >= requested, timeout)
+        return latest_snapshot
+
+def request_refresh(sid, full=False):
+    """Queue a client for the next on-demand resample"""
+    with snapshot_condition:
+        pending_refresh[sid] = pending_refresh.get(sid, False) or full
+    refresh_event.set()
+
+def adapt_process_interval(cost):
+    """Pick the process list interval that keeps the scan within its CPU budget"""
+    cost_avg = sampler_stats['process_cost_avg'] * 0.7 + cost * 0.3
+    with sampler_stats_lock:
+        sampler_stats['process_cost_avg'] = cost_avg
+    return min(max(PROCESS_INTERVAL, cost_avg / PROCESS_CPU_BUDGET), PROCESS_MAX_INTERVAL)
+
+def background_scan_needed():
+    """Whether processes must be scanned even with no dashboard subscribed to them"""
+    return alert_engine.process_rules > 0 or leak_detector.window > 0
+
+def sampler_task():
+    """Background task that samples on fixed-rate ticks and fans snapshots out to clients.
+    
+    System metrics and the process list have their own schedules. The process
+    scan backs off when it costs more than PROCESS_CPU_BUDGET. While no
+    dashboard subscribes to a process stream it runs every PROCESS_MAX_INTERVAL
+    if background_scan_needed(), and stops otherwise, leaving only a metrics
+    heartbeat to keep the history going.
+    """
+    global pending_refresh, scan_requested
+    
+    metrics_schedule = TickSchedule(METRICS_INTERVAL)
+    process_schedule = TickSchedule(PROCESS_INTERVAL)
+    watched = False
+    
+    while True:
+        try:
+            with client_snapshots_lock:
+                subscribers = len(client_process_snapshots)
+                stream_sids = {stream: [sid for sid, state in client_process_snapshots.items()
+                                        if stream in state['streams']]
+                               for stream in PROCESS_STREAMS}
+            process_sids = set().union(*stream_sids.values())
+            with sampler_stats_lock:
+                sampler_stats['subscribers'] = subscribers
+                sampler_stats['process_subscribers'] = len(process_sids)
+            background = background_scan_needed()
+            
+            now = time.monotonic()
+            metrics_schedule.reschedule(METRICS_INTERVAL if subscribers else HEARTBEAT_INTERVAL, now)
+            if process_sids and not watched:
+                # Scan straight away for a new subscriber instead of waiting out the background interval
+                process_schedule.next_tick = now
+            watched = bool(process_sids)
+            
+            # Sleep until the next tick, waking early for manual refreshes and new clients
+            next_tick = metrics_schedule.next_tick
+            if process_sids or background:
+                next_tick = min(next_tick, process_schedule.next_tick)
+            if next_tick > now:
+                refresh_event.wait(next_tick - now)
+            refresh_event.clear()
+            
+            now = time.monotonic()
+            metrics_due = metrics_schedule.due(now)
+            process_due = bool(process_sids or background) and process_schedule.due(now)
+            
+            with snapshot_condition:
+                pending, pending_refresh = pending_refresh, {}
+                requested, scan_requested = scan_requested, False
+            
+            # Refreshes arriving shortly after a scan are served from that scan
+            snapshot = latest_snapshot
+            stale = snapshot is None or time.time() - snapshot.process_timestamp >= REFRESH_MIN_INTERVAL
+            collect_processes = process_due or ((bool(pending) or requested) and stale)
             
-            # Get process list if auto-refresh is enabled
-            if auto_refresh_enabled:
-                processes = get_process_list()
-                socketio.emit('process_list', processes)
+            if metrics_due or collect_processes:
+                snapshot = take_snapshot(metrics_due, collect_processes)
             
-            # Sleep for 2 seconds
-            time.sleep(2)
+            if metrics_due:
+                emit('system_metrics', json_metrics(snapshot.metrics), to=metrics_room('json'))
+                emit('system_metrics_packed', pack_metrics(snapshot.metrics), to=metrics_room('columnar'))
+                emit('io_devices', device_io_sampler.latest(), to='io_devices')
+                metrics_schedule.advance(time.monotonic())
+            
+            if collect_processes:
+                interval = adapt_process_interval(sampler_stats['process_cost'])
+                if not process_sids:
+                    # Nobody is watching, the scan only feeds the alert rules and leak detector
+                    interval = PROCESS_MAX_INTERVAL
+                process_schedule.reschedule(interval, now)
+                with sampler_stats_lock:
+                    sampler_stats['process_interval'] = interval
+            if process_due:
+                process_schedule.advance(time.monotonic())
+            with sampler_stats_lock:
+                sampler_stats['metrics_interval'] = metrics_schedule.interval
+            
+            # Push the process list to its subscribers on a tick,
+            # and to any client that asked for a refresh
+            sids = set(pending)
+            if process_due:
+                sids.update(stream_sids['process_list'])
+            
+            for sid in sids:
+                emit_process_list(sid, snapshot.processes, pending.get(sid, False))
+            
+            # The other process streams only go out on a tick
+            if process_due:
+                for stream, emit_stream in PROCESS_STREAM_EMITTERS.items():
+                    for sid in stream_sids[stream]:
+                        emit_stream(sid)
+            
+            if sids or process_due:
+                update_compression_tick_stats()
         except Exception as e:
-            logger.error(f"Error in background task: {e}")
+            logger.error(f"Error in sampler task: {e}")
             time.sleep(5)  # Wait a bit longer if there's an error
 
 @app.route('/')
 def index():
     """Serve the dashboard page"""
-    return render_template('index.html')
+    _, page = get_static_assets()
+    # The page URL never changes, so browsers revalidate it on every load
+    return serve_asset(page, 'no-cache')
+
+@app.route('/static/<path:name>')
+def static_asset(name):
+    """Serve a file from static/ out of memory"""
+    assets, _ = get_static_assets()
+    asset = assets.get(name)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    # Only URLs tagged with the current ETag may be cached for good
+    if request.args.get('v') == asset.etag:
+        return serve_asset(asset, f'public, max-age={ASSET_MAX_AGE}, immutable')
+    return serve_asset(asset, 'no-cache')
 
-@socketio.on('connect')
-def handle_connect():
+@app.route('/api/history')
+def api_history():
+    """Return system metric history, or one process's history with ?pid="""
+    if not history_store:
+        return jsonify({'error': 'History storage is disabled'}), 404
+    
+    try:
+        end = float(request.args.get('end', time.time()))
+        start = float(request.args.get('start', end - 3600))
+        points = min(max(int(request.args.get('points', 2000)), 1), 10000)
+        pid = int(request.args['pid']) if 'pid' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'Invalid start, end, points or pid'}), 400
+    
+    return jsonify(history_store.query(start, end, points, pid))
+
+@app.route('/api/process_tree')
+def api_process_tree():
+    """Return the process tree, or the subtree under ?root=, down to ?depth= levels"""
+    try:
+        root = int(request.args['root']) if 'root' in request.args else None
+        depth = min(max(int(request.args.get('depth', TREE_DEFAULT_DEPTH)), 0), 64)
+    except ValueError:
+        return jsonify({'error': 'Invalid root or depth'}), 400
+    
+    snapshot = get_fresh_snapshot()
+    return jsonify(dict(process_tree.subtree(root, depth), process_timestamp=snapshot.process_timestamp))
+
+@app.route('/api/process_groups')
+def api_process_groups():
+    """Return process groups, e.g. ?by=name&sort=memory_mb_sum&limit=20"""
+    query = parse_group_query(request.args.to_dict())
+    snapshot = get_fresh_snapshot()
+    return jsonify(dict(process_groups.query(**query), process_timestamp=snapshot.process_timestamp))
+
+@app.route('/api/process_top')
+def api_process_top():
+    """Return the top processes, e.g. ?key=memory_mb&k=10"""
+    query = parse_top_k_query(request.args.to_dict())
+    snapshot = get_fresh_snapshot()
+    return jsonify({
+        'key': query['key'],
+        'k': query['k'],
+        'process_timestamp': snapshot.process_timestamp,
+        'total': len(snapshot.processes),
+        'processes': select_top_k(snapshot, query['key'], query['k'])
+    })
+
+@app.route('/api/process_leaks')
+def api_process_leaks():
+    """Return processes whose memory keeps growing, e.g. ?limit=10"""
+    limit = parse_leak_limit(request.args.get('limit', DEFAULT_LEAK_LIMIT))
+    snapshot = get_fresh_snapshot()
+    return jsonify({
+        'window': leak_detector.window,
+        'process_timestamp': snapshot.process_timestamp,
+        'processes': leak_detector.leaks(limit)
+    })
+
+@app.route('/api/io_devices')
+def api_io_devices():
+    """Return per-disk and per-interface I/O rates from the last metrics tick"""
+    get_latest_snapshot()
+    return jsonify(device_io_sampler.latest())
+
+@app.route('/api/alerts')
+def api_alerts():
+    """Return firing and recently resolved alerts"""
+    return jsonify({
+        'active': alert_engine.active(),
+        'resolved': alert_engine.history(),
+        'rules': [rule.name for rule in alert_engine.rules]
+    })
+
+@app.route('/api/stats')
+def api_stats():
+    """Return sampler, compression and alert engine statistics"""
+    # Copy under the writers' locks, the sampler keeps updating them while this serializes
+    with sampler_stats_lock:
+        sampler = copy.deepcopy(sampler_stats)
+    with compression_stats_lock:
+        compression = copy.deepcopy(compression_stats)
+    return jsonify({'sampler': sampler, 'compression': compression, 'alerts': alert_engine.statistics()})
+
+@socket_event('connect')
+def handle_connect(sid, auth=None):
     """Handle client connection"""
     logger.info('Client connected')
     
-    # Send initial data
-    socketio.emit('system_metrics', get_system_metrics())
-    socketio.emit('process_list', get_process_list())
+    with client_snapshots_lock:
+        client_process_snapshots[sid] = {
+            'streams': set(DEFAULT_STREAMS),
+            'encoding': 'json',
+            'compressor': None,
+            'send_lock': threading.Lock(),
+            'query': dict(DEFAULT_PROCESS_QUERY),
+            'tree_expanded': {},
+            'group_query': dict(DEFAULT_GROUP_QUERY),
+            'top_query': dict(DEFAULT_TOP_K_QUERY),
+            'top_members': [],
+            'seq': 0,
+            'processes': None
+        }
+    join_room(sid, metrics_room('json'))
+    join_room(sid, 'alerts')
+    emit('active_alerts', alert_engine.active(), to=sid)
+    
+    # Send initial data from the sampler's newest snapshot
+    snapshot = get_latest_snapshot()
+    if snapshot:
+        emit('metrics_history', metrics_history.recent(METRICS_BACKFILL_SECONDS), to=sid)
+        emit('system_metrics', json_metrics(snapshot.metrics), to=sid)
+    
+    # The process scan pauses while nobody is connected, so a stale list is rescanned first
+    if snapshot and time.time() - snapshot.process_timestamp < PROCESS_MAX_INTERVAL:
+        emit_process_list(sid, snapshot.processes, full=True)
+    else:
+        request_refresh(sid, full=True)
+    
+    # Wake the sampler in case it is idling on the heartbeat schedule
+    refresh_event.set()
 
-@socketio.on('request_process_list')
-def handle_request_process_list():
+@socket_event('disconnect')
+def handle_disconnect(sid, reason=None):
+    """Handle client disconnection"""
+    logger.info('Client disconnected')
+    
+    # Forget the snapshot this client was diffed against
+    with client_snapshots_lock:
+        client_process_snapshots.pop(sid, None)
+
+@socket_event('request_process_list')
+def handle_request_process_list(sid, data=None):
     """Handle request for process list"""
-    socketio.emit('process_list', get_process_list())
+    full = bool(data and data.get('full'))
+    request_refresh(sid, full)
+
+@socket_event('set_process_query')
+def handle_set_process_query(sid, data):
+    """Handle a client subscribing to a filtered, sorted page of the process list"""
+    query = parse_process_query(data)
+    
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        state['query'] = query
+    
+    # Answer straight away from the newest snapshot
+    snapshot = get_latest_snapshot()
+    if snapshot:
+        emit_process_list(sid, snapshot.processes)
 
-@socketio.on('get_process_details')
-def handle_get_process_details(data):
+@socket_event('get_process_details')
+def handle_get_process_details(sid, data):
     """Handle request for process details"""
     pid = data.get('pid')
     if pid:
         details = get_process_details(pid)
-        socketio.emit('process_details', details)
+        emit('process_details', details, to=sid)
+        
+        if 'error' not in details:
+            stream_process_detail_sections(pid, lambda section, value: emit(
+                'process_details_section', {'pid': pid, 'section': section, 'value': value}, to=sid))
 
-@socketio.on('kill_process')
-def handle_kill_process(data):
+@socket_event('kill_process')
+def handle_kill_process(sid, data):
     """Handle request to kill a process"""
     pid = data.get('pid')
     force = data.get('force', False)
     
     if pid:
         result = kill_process(pid, force)
-        socketio.emit('process_killed', result)
+        emit('process_killed', result, to=sid)
 
-@socketio.on('suspend_process')
-def handle_suspend_process(data):
+@socket_event('suspend_process')
+def handle_suspend_process(sid, data):
     """Handle request to suspend a process"""
     pid = data.get('pid')
     
     if pid:
         result = suspend_process(pid)
-        socketio.emit('process_suspended', result)
+        emit('process_suspended', result, to=sid)
 
-@socketio.on('resume_process')
-def handle_resume_process(data):
+@socket_event('resume_process')
+def handle_resume_process(sid, data):
     """Handle request to resume a process"""
     pid = data.get('pid')
     
     if pid:
         result = resume_process(pid)
-        socketio.emit('process_resumed', result)
+        emit('process_resumed', result, to=sid)
+
+def set_subscription(sid, stream, enabled):
+    """Subscribe a client to a periodic stream or unsubscribe it"""
+    if stream not in STREAMS:
+        return
+    
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        if enabled:
+            state['streams'].add(stream)
+        else:
+            state['streams'].discard(stream)
+        encoding = state['encoding']
+    
+    if stream == 'system_metrics':
+        (join_room if enabled else leave_room)(sid, metrics_room(encoding))
+    elif stream == 'io_devices':
+        (join_room if enabled else leave_room)(sid, stream)
+        if enabled:
+            emit('io_devices', device_io_sampler.latest(), to=sid)
+    elif stream == 'alerts':
+        (join_room if enabled else leave_room)(sid, stream)
+        if enabled:
+            emit('active_alerts', alert_engine.active(), to=sid)
+    else:
+        # Let the sampler resume or stop scanning straight away
+        refresh_event.set()
+        if enabled and stream in PROCESS_STREAM_EMITTERS:
+            PROCESS_STREAM_EMITTERS[stream](sid)
+
+@socket_event('set_tree_expanded')
+def handle_set_tree_expanded(sid, data):
+    """Handle a client opening or collapsing a node of the process tree"""
+    try:
+        pid = int(data.get('pid'))
+    except (TypeError, ValueError):
+        return
+    
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        state['tree_expanded'][pid] = bool(data.get('expanded'))
+    
+    # Answer straight away from the latest scan instead of waiting for the next tick
+    emit_process_tree(sid)
+
+@socket_event('set_group_by')
+def handle_set_group_by(sid, data):
+    """Handle a client changing how its process_groups stream is grouped and sorted"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        state['group_query'] = parse_group_query(data, state['group_query'])
+        subscribed = 'process_groups' in state['streams']
+    
+    if subscribed:
+        emit_process_groups(sid)
+
+@socket_event('set_top_k')
+def handle_set_top_k(sid, data):
+    """Handle a client changing the key or size of its process_top stream"""
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+        if state is None:
+            return
+        query = parse_top_k_query(data, state['top_query'])
+        if query != state['top_query']:
+            # Start a new top set rather than holding on to the old one
+            state['top_query'] = query
+            state['top_members'] = []
+        subscribed = 'process_top' in state['streams']
+    
+    if subscribed:
+        emit_process_top(sid)
+
+@socket_event('subscribe')
+def handle_subscribe(sid, data):
+    """Handle a client subscribing to a periodic stream"""
+    set_subscription(sid, data.get('stream'), True)
+
+@socket_event('unsubscribe')
+def handle_unsubscribe(sid, data):
+    """Handle a client unsubscribing from a periodic stream"""
+    set_subscription(sid, data.get('stream'), False)
+
+@socket_event('set_encoding')
+def handle_set_encoding(sid, data):
+    """Handle a client negotiating the wire encoding of its streams"""
+    offered = data.get('formats') or []
+    encoding = next((fmt for fmt in offered if fmt in WIRE_ENCODINGS), 'json')
+    compression = 'deflate' if 'deflate' in (data.get('compression') or []) else None
+    
+    with client_snapshots_lock:
+        state = client_process_snapshots.get(sid)
+    if state is None:
+        return
+    
+    # Switch under the send lock so no frame in the new encoding goes out before the schema
+    with state['send_lock']:
+        with client_snapshots_lock:
+            previous, state['encoding'] = state['encoding'], encoding
+            subscribed = 'system_metrics' in state['streams']
+        
+        # The schema is sent once; packed frames carry only values
+        emit('wire_schema', {
+            'encoding': encoding,
+            'compression': compression,
+            'version': WIRE_FORMAT_VERSION,
+            'process': PROCESS_WIRE_SCHEMA,
+            'metrics': METRICS_WIRE_SCHEMA,
+            'metrics_arrays': METRICS_ARRAY_FIELDS,
+            'cpu_breakdown': CPU_BREAKDOWN_FIELDS,
+            'pressure': PRESSURE_FIELDS
+        }, to=sid)
+        
+        # A fresh deflate stream, started and primed by the first frame that needs it
+        state['compressor'] = ClientCompressor() if compression else None
+    
+    # Packed metrics are broadcast to a room, so join it only once the client has the schema
+    if subscribed and previous != encoding:
+        leave_room(sid, metrics_room(previous))
+        join_room(sid, metrics_room(encoding))
+    
+    # Resync the process list in the new encoding
+    request_refresh(sid, full=True)
 
-@socketio.on('set_auto_refresh')
-def handle_set_auto_refresh(data):
-    """Handle setting auto-refresh state"""
-    global auto_refresh_enabled
-    auto_refresh_enabled = data.get('enabled', True)
+@socket_event('set_auto_refresh')
+def handle_set_auto_refresh(sid, data):
+    """Handle setting auto-refresh state for this client's process list"""
+    set_subscription(sid, 'process_list', data.get('enabled', True))
+
+def run_async_server(host, port):
+    """Serve the dashboard from an asyncio event loop.
+    
+    Socket.IO runs on python-socketio's AsyncServer and the Flask routes are
+    mounted through an ASGI adapter, all under uvicorn. Socket handlers run
+    on a thread pool, so a slow kill or details call never holds up the
+    loop or the metric pushes to other sessions, and idle connections cost
+    only a coroutine each. A session's handlers still run one at a time, in
+    the order its events arrived, so nothing overtakes its connect handler.
+    """
+    try:
+        import socketio as python_socketio
+        import uvicorn
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError as e:
+        logger.error(f"Async server mode needs uvicorn and asgiref (pip install uvicorn asgiref): {e}")
+        sys.exit(1)
+    
+    # Connect first so emits from the connect handler reach the client
+    server = python_socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', always_connect=True)
+    handler_executor = ThreadPoolExecutor(max_workers=ASYNC_HANDLER_WORKERS, thread_name_prefix='handler')
+    
+    # sid -> lock serializing that session's handlers; asyncio locks wake waiters in FIFO order
+    session_locks = {}
+    
+    def register(event, handler):
+        async def run_handler(sid, *args):
+            # connect receives (environ, auth); everything else a single payload
+            data = args[-1] if args else None
+            lock = session_locks.setdefault(sid, asyncio.Lock())
+            async with lock:
+                await asyncio.get_running_loop().run_in_executor(handler_executor, handler, sid, data)
+            if event == 'disconnect':
+                session_locks.pop(sid, None)
+        server.on(event, run_handler)
+    
+    for event, handler in socket_handlers.items():
+        register(event, handler)
+    
+    asgi_app = python_socketio.ASGIApp(server, other_asgi_app=WsgiToAsgi(app))
+    config = uvicorn.Config(asgi_app, host=host, port=port, log_level='warning')
+    
+    async def serve():
+        global async_server, async_loop
+        async_loop = asyncio.get_running_loop()
+        async_server = server
+        await uvicorn.Server(config).serve()
+    
+    asyncio.run(serve())
 
 if __name__ == '__main__':
-    # Start background task
-    thread = threading.Thread(target=background_task)
+    if '--vendor-assets' in sys.argv:
+        vendor_assets()
+        sys.exit(0)
+    
+    # Open the history before the sampler's first tick so it is recorded
+    start_history_store()
+    
+    # Start the sampler
+    thread = threading.Thread(target=sampler_task)
     thread.daemon = True
     thread.start()
     
     # Start the server
-    logger.info("Starting Enhanced Process Monitor Dashboard on http://localhost:9999")
-    socketio.run(app, host='0.0.0.0', port=9999, debug=False)
+    logger.info(f"Starting Enhanced Process Monitor Dashboard on http://localhost:9999 ({SERVER_MODE} mode)")
+    if SERVER_MODE == 'asyncio':
+        run_async_server('0.0.0.0', 9999)
+    else:
+        socketio.run(app, host='0.0.0.0', port=9999, debug=False)
 
 # Run this script with: python enhanced_process_monitor.py
 print("Enhanced Process Monitor Dashboard is running at http://localhost:9999")
\ No newline at end of file
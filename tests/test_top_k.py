@@ -0,0 +1,51 @@
+import enhanced_process_monitor as monitor
+
+
+def snapshot(cpu_by_pid, version):
+    processes = [{'pid': pid, 'cpu_percent': cpu} for pid, cpu in cpu_by_pid.items()]
+    return monitor.Snapshot(version, {}, processes, 0, False, True)
+
+
+def top_pids(snap, k, members=()):
+    return [proc['pid'] for proc in monitor.select_top_k(snap, 'cpu', k, members)]
+
+
+def test_new_process_jumps_to_first():
+    cpu = {pid: 50 - pid for pid in range(1, 31)}
+    cpu[99] = 99
+    assert top_pids(snapshot(cpu, 1), 20, members=range(1, 21)) == [99] + list(range(1, 20))
+
+
+def test_member_just_below_cut_off_keeps_its_row():
+    # PID 20 slipped to rank 21, behind a newcomer only slightly ahead of it
+    cpu = {pid: 50 - pid for pid in range(1, 31)}
+    cpu[20], cpu[25] = 29.5, 30.5
+    result = top_pids(snapshot(cpu, 2), 20, members=range(1, 21))
+    assert 20 in result and 25 not in result
+
+
+def contested_cpu(member, newcomer):
+    """PIDs 1-19 well inside the top 20, PID 20 at rank 21 behind newcomer PID 25, the rest far below"""
+    cpu = {pid: 50 - pid for pid in range(1, 20)}
+    cpu.update({pid: 1 for pid in range(21, 31)})
+    cpu[20], cpu[25] = member, newcomer
+    return cpu
+
+
+def test_newcomer_well_ahead_of_member_gets_in():
+    # PID 20 is inside the band, but 30.5 > 23 * 1.25
+    result = top_pids(snapshot(contested_cpu(23, 30.5), 3), 20, members=range(1, 21))
+    assert 25 in result and 20 not in result
+
+
+def test_hysteresis_margin_edges():
+    # Against a newcomer at 30, a member at 24.1 is within the 25% margin and one at 23.9 isn't
+    result = top_pids(snapshot(contested_cpu(24.1, 30), 5), 20, members=range(1, 21))
+    assert 20 in result and 25 not in result
+    result = top_pids(snapshot(contested_cpu(23.9, 30), 6), 20, members=range(1, 21))
+    assert 25 in result and 20 not in result
+
+
+def test_without_members_is_strict_top_k():
+    cpu = {pid: pid for pid in range(1, 101)}
+    assert top_pids(snapshot(cpu, 4), 5) == [100, 99, 98, 97, 96]